@@ -0,0 +1,30 @@
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from app.config import settings
+
+_session = None
+
+
+def get_http_session() -> requests.Session:
+    """
+    Sessão HTTP compartilhada (keep-alive) com pool de conexões e retries
+    para falhas transitórias.
+    """
+    global _session
+    if not _session:
+        retry = Retry(
+            total=settings.FOTO_RETRIES,
+            backoff_factor=0.3,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=["GET", "HEAD"],
+        )
+        adapter = HTTPAdapter(
+            pool_connections=settings.FOTO_MAX_WORKERS,
+            pool_maxsize=settings.FOTO_MAX_WORKERS,
+            max_retries=retry,
+        )
+        _session = requests.Session()
+        _session.mount("http://", adapter)
+        _session.mount("https://", adapter)
+    return _session
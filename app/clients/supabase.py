@@ -1,7 +1,8 @@
-from supabase import create_client
+from supabase import AsyncClient, acreate_client, create_client
 from app.config import settings
 
 _supabase = None
+_supabase_async = None
 
 
 def get_supabase_client():
@@ -9,3 +10,30 @@ def get_supabase_client():
     if not _supabase:
         _supabase = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
     return _supabase
+
+
+async def abrir_supabase_async() -> AsyncClient:
+    """Cria o cliente assíncrono (uma vez por lifespan da aplicação)."""
+    global _supabase_async
+    if not _supabase_async:
+        _supabase_async = await acreate_client(
+            settings.SUPABASE_URL, settings.SUPABASE_KEY
+        )
+    return _supabase_async
+
+
+async def fechar_supabase_async() -> None:
+    """Fecha as conexões HTTP do cliente assíncrono ao desligar a API."""
+    global _supabase_async
+    if _supabase_async:
+        # PostgREST e Storage só existem se já foram usados
+        for cliente in (_supabase_async._postgrest, _supabase_async._storage):
+            if cliente is not None:
+                await cliente.aclose()
+        _supabase_async = None
+
+
+def get_supabase_async_client() -> AsyncClient:
+    if not _supabase_async:
+        raise RuntimeError("Cliente assíncrono do Supabase não foi aberto no lifespan")
+    return _supabase_async
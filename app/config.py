@@ -1,3 +1,6 @@
+import os
+import tempfile
+
 from pydantic_settings import BaseSettings
 
 from typing import List
@@ -7,6 +10,55 @@ class Settings(BaseSettings):
     SUPABASE_KEY: str
     ALLOWED_ORIGINS: List[str] = ["*"]
 
+    # Fila de geração de relatórios
+    JOBS_BACKEND: str = "memory"  # "memory" ou "sqlite"
+    JOBS_SQLITE_PATH: str = "jobs.sqlite3"
+    REPORT_WORKERS: int = 2
+    REPORT_QUEUE_MAX: int = 100
+    LOTE_WORKERS: int = 2  # relatórios gerados em paralelo por POST /reports/batch
+    LOTE_MAX_ITENS: int = 200
+
+    # Etapas de um relatório executadas em paralelo (pools compartilhados)
+    ETAPAS_IO_WORKERS: int = 16
+    ETAPAS_CPU_WORKERS: int = os.cpu_count() or 1
+    # Relatórios em montagem ao mesmo tempo nos handlers async
+    RELATORIOS_ASYNC_WORKERS: int = 32
+
+    # Download dos registros fotográficos
+    FOTO_TIMEOUT: float = 10.0  # segundos (conexão e leitura)
+    FOTO_MAX_BYTES: int = 15 * 1024 * 1024
+    FOTO_RETRIES: int = 3
+    FOTO_MAX_WORKERS: int = 8
+
+    # Cache em disco das fotos já reduzidas para o espaço de 5 cm
+    FOTO_CACHE_DIR: str = os.path.join(tempfile.gettempdir(), "cache_fotos")
+    FOTO_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+    FOTO_CACHE_MAX_AGE: int = 30 * 24 * 3600  # descarta após 30 dias sem uso
+    FOTO_CACHE_TTL: int = 24 * 3600  # revalida com o servidor (ETag) após 1 dia
+    FOTO_LARGURA_PX: int = 600  # 5 cm a ~300 dpi
+
+    # Processos que desenham os gráficos (0 = desenha na thread do relatório)
+    GRAFICOS_WORKERS: int = os.cpu_count() or 1
+
+    # Cache dos PNGs dos gráficos, endereçado pelo hash dos dados de entrada
+    GRAFICOS_CACHE_MEM_BYTES: int = 64 * 1024 * 1024
+    GRAFICOS_CACHE_DIR: str = os.path.join(tempfile.gettempdir(), "cache_graficos")
+    GRAFICOS_CACHE_MAX_BYTES: int = 512 * 1024 * 1024
+
+    # Relatório renderizado fica em memória até esse tamanho antes de ir ao disco
+    DOCX_SPOOL_MAX_BYTES: int = 32 * 1024 * 1024
+
+    # Cache das tabelas de referência (ativos e configuração dos formulários)
+    REFERENCIAS_CACHE_TTL: int = 300  # segundos
+    REFERENCIAS_CACHE_MAX: int = 1000  # entradas
+
+    # Relatórios idênticos (mesma campanha e entradas) reaproveitados
+    RELATORIOS_REUSO_TTL: int = 3600  # segundos (0 = só junta os simultâneos)
+    RELATORIOS_REUSO_MAX: int = 1000  # entradas
+
+    # Histórico de resultados por ativo (Parquet, um arquivo por campanha)
+    HISTORICO_DIR: str = os.path.join(tempfile.gettempdir(), "historico")
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
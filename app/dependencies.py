@@ -1,6 +1,11 @@
-from app.clients.supabase import get_supabase_client
+from app.clients.supabase import get_supabase_async_client, get_supabase_client
 
 
 def get_supabase():
 
     return get_supabase_client()
+
+
+async def get_supabase_async():
+
+    return get_supabase_async_client()
@@ -0,0 +1,165 @@
+# app/jobs/backends.py
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional
+from uuid import uuid4
+
+from pytz import timezone
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+CAMPOS = [
+    "id",
+    "tipo",
+    "status",
+    "payload",
+    "criado_em",
+    "iniciado_em",
+    "finalizado_em",
+    "url_relatorio",
+    "mensagem",
+    "perfil",
+]
+
+
+def agora() -> str:
+    return datetime.now(timezone("America/Sao_Paulo")).isoformat()
+
+
+class MemoryJobStore:
+    """
+    Guarda os jobs em memória (perdidos ao reiniciar o processo).
+    Mantém no máximo `max_jobs` registros, descartando os mais antigos.
+    """
+
+    def __init__(self, max_jobs: int = 1000):
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._max_jobs = max_jobs
+
+    def criar(self, tipo: str, payload: dict) -> dict:
+        job = dict.fromkeys(CAMPOS)
+        job.update(
+            id=uuid4().hex,
+            tipo=tipo,
+            status=STATUS_QUEUED,
+            payload=payload,
+            criado_em=agora(),
+        )
+        with self._lock:
+            self._jobs[job["id"]] = job
+            while len(self._jobs) > self._max_jobs:
+                self._jobs.popitem(last=False)
+        return dict(job)
+
+    def atualizar(self, job_id: str, **campos) -> None:
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(campos)
+
+    def obter(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def pendentes(self) -> list:
+        with self._lock:
+            return [
+                dict(job)
+                for job in self._jobs.values()
+                if job["status"] in (STATUS_QUEUED, STATUS_RUNNING)
+            ]
+
+
+class SQLiteJobStore:
+    """
+    Guarda os jobs em um arquivo SQLite, permitindo retomar a fila após
+    reiniciar a API.
+    """
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    tipo TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    criado_em TEXT NOT NULL,
+                    iniciado_em TEXT,
+                    finalizado_em TEXT,
+                    url_relatorio TEXT,
+                    mensagem TEXT,
+                    perfil TEXT
+                )
+                """
+            )
+            # arquivos criados antes do ?profile=1 não têm a coluna
+            colunas = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+            if "perfil" not in colunas:
+                self._conn.execute("ALTER TABLE jobs ADD COLUMN perfil TEXT")
+
+    def _to_dict(self, row) -> dict:
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        return job
+
+    def criar(self, tipo: str, payload: dict) -> dict:
+        job = dict.fromkeys(CAMPOS)
+        job.update(
+            id=uuid4().hex,
+            tipo=tipo,
+            status=STATUS_QUEUED,
+            payload=payload,
+            criado_em=agora(),
+        )
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (id, tipo, status, payload, criado_em) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (
+                    job["id"],
+                    tipo,
+                    job["status"],
+                    json.dumps(payload),
+                    job["criado_em"],
+                ),
+            )
+        return job
+
+    def atualizar(self, job_id: str, **campos) -> None:
+        campos = {k: v for k, v in campos.items() if k in CAMPOS and k != "id"}
+        if not campos:
+            return
+        if "payload" in campos:
+            campos["payload"] = json.dumps(campos["payload"])
+        sets = ", ".join(f"{k} = ?" for k in campos)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"UPDATE jobs SET {sets} WHERE id = ?", (*campos.values(), job_id)
+            )
+
+    def obter(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return self._to_dict(row) if row else None
+
+    def pendentes(self) -> list:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM jobs WHERE status IN (?, ?) ORDER BY criado_em",
+                (STATUS_QUEUED, STATUS_RUNNING),
+            ).fetchall()
+        return [self._to_dict(row) for row in rows]
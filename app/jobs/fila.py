@@ -0,0 +1,157 @@
+# app/jobs/fila.py
+import threading
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException
+
+from app.clients.supabase import get_supabase_client
+from app.config import settings
+from app.jobs.backends import (
+    STATUS_DONE,
+    STATUS_FAILED,
+    STATUS_QUEUED,
+    STATUS_RUNNING,
+    MemoryJobStore,
+    SQLiteJobStore,
+    agora,
+)
+from app.schemas.qag import QAGRequest
+from app.schemas.qags import QAGSRequest
+from app.schemas.qsd import QSDRequest
+from app.services.qag_service import gerar_relatorio_qag
+from app.services.qags_service import gerar_relatorio_qags
+from app.services.qsd_service import gerar_relatorio_qsd
+from app.utils.perfil import perfilar
+
+# tipo do relatório -> (função geradora, schema do payload)
+GERADORES = {
+    "qag": (gerar_relatorio_qag, QAGRequest),
+    "qsd": (gerar_relatorio_qsd, QSDRequest),
+    "qags": (gerar_relatorio_qags, QAGSRequest),
+}
+
+
+def _campos_perfil(perfil) -> dict:
+    return {"perfil": perfil.resumo} if perfil is not None else {}
+
+
+class FilaRelatorios:
+    """
+    Executa a geração de relatórios em um pool limitado de threads,
+    registrando o andamento de cada job no store configurado.
+    """
+
+    def __init__(self, store, max_workers: int, max_pendentes: int):
+        self.store = store
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="relatorio"
+        )
+        # limita quantos jobs podem aguardar/executar ao mesmo tempo
+        self._vagas = threading.BoundedSemaphore(max_pendentes)
+
+    def enfileirar(self, tipo: str, supabase, payload, perfil: bool = False) -> dict:
+        """
+        Cria o job e agenda a geração. Com `perfil`, a geração roda sob o
+        cProfile e o resumo fica no campo `perfil` do job.
+        """
+        if not self._vagas.acquire(blocking=False):
+            raise HTTPException(503, detail="Fila de relatórios cheia, tente novamente")
+        job = None
+        try:
+            job = self.store.criar(tipo, payload.model_dump(mode="json"))
+            self._executor.submit(
+                self._executar, job["id"], tipo, supabase, payload, perfil
+            )
+        except BaseException as e:
+            # o job não chegou ao pool: `_executar` não vai liberar a vaga
+            self._vagas.release()
+            if job is not None:
+                self.store.atualizar(
+                    job["id"], status=STATUS_FAILED, finalizado_em=agora(), mensagem=str(e)
+                )
+            raise
+        return job
+
+    def _executar(
+        self, job_id: str, tipo: str, supabase, payload, perfil: bool = False
+    ) -> None:
+        gerador, _ = GERADORES[tipo]
+        self.store.atualizar(job_id, status=STATUS_RUNNING, iniciado_em=agora())
+        perfilado = None
+        try:
+            with perfilar() if perfil else nullcontext() as perfilado:
+                resposta = gerador(supabase, payload)
+            self.store.atualizar(
+                job_id,
+                status=STATUS_DONE if resposta.sucesso else STATUS_FAILED,
+                finalizado_em=agora(),
+                url_relatorio=resposta.url_relatorio,
+                mensagem=resposta.mensagem,
+                **_campos_perfil(perfilado),
+            )
+        except HTTPException as e:
+            self.store.atualizar(
+                job_id,
+                status=STATUS_FAILED,
+                finalizado_em=agora(),
+                mensagem=e.detail,
+                **_campos_perfil(perfilado),
+            )
+        except Exception as e:
+            self.store.atualizar(
+                job_id,
+                status=STATUS_FAILED,
+                finalizado_em=agora(),
+                mensagem=str(e),
+                **_campos_perfil(perfilado),
+            )
+        finally:
+            self._vagas.release()
+
+    def retomar_pendentes(self) -> None:
+        """
+        Reenfileira os jobs que ficaram na fila (ou em execução) quando a
+        API foi encerrada. Só tem efeito com o backend SQLite.
+        """
+        for job in self.store.pendentes():
+            _, schema = GERADORES[job["tipo"]]
+            if not self._vagas.acquire(blocking=False):
+                self.store.atualizar(
+                    job["id"],
+                    status=STATUS_FAILED,
+                    finalizado_em=agora(),
+                    mensagem="Fila cheia ao retomar o job",
+                )
+                continue
+            try:
+                self.store.atualizar(job["id"], status=STATUS_QUEUED, iniciado_em=None)
+                self._executor.submit(
+                    self._executar,
+                    job["id"],
+                    job["tipo"],
+                    get_supabase_client(),
+                    schema(**job["payload"]),
+                )
+            except BaseException:
+                self._vagas.release()
+                raise
+
+    def encerrar(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_fila = None
+
+
+def get_fila() -> FilaRelatorios:
+    global _fila
+    if not _fila:
+        if settings.JOBS_BACKEND == "sqlite":
+            store = SQLiteJobStore(settings.JOBS_SQLITE_PATH)
+        else:
+            store = MemoryJobStore()
+        _fila = FilaRelatorios(
+            store, settings.REPORT_WORKERS, settings.REPORT_QUEUE_MAX
+        )
+    return _fila
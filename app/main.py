@@ -1,15 +1,47 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI  # type: ignore
 from fastapi.middleware.cors import CORSMiddleware  # type: ignore
 
+from app.clients.supabase import abrir_supabase_async, fechar_supabase_async
 from app.config import settings
 from app.routers import qag
 from app.routers import qsd
 from app.routers import qags
+from app.routers import jobs
+from app.routers import cache
+from app.routers import batch
+from app.routers import historico
+from app.routers import metricas
+from app.jobs.fila import get_fila
+from app.services import qag_service, qags_service, qsd_service  # noqa: F401
+from app.services.motor import ESPECIFICACOES
+from app.utils.graficos_pool import aquecer_pool_graficos, encerrar_pool_graficos
+from app.utils.templates import carregar_templates
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # templates das especificações registradas já ficam parseados em memória
+    carregar_templates([e.template for e in ESPECIFICACOES.values()])
+    # processos de desenho dos gráficos já sobem com matplotlib carregado
+    aquecer_pool_graficos()
+    # cliente assíncrono (PostgREST e Storage) dos handlers async
+    await abrir_supabase_async()
+    # retoma jobs pendentes (backend SQLite) e encerra os pools ao desligar
+    fila = get_fila()
+    fila.retomar_pendentes()
+    yield
+    fila.encerrar()
+    encerrar_pool_graficos()
+    await fechar_supabase_async()
+
 
 app = FastAPI(
     title="API EC-Infra",
     version="1.0.0",
     description="Backend para geração de relatórios QAG, QSD, QAR e afins",
+    lifespan=lifespan,
 )
 
 # CORS
@@ -26,6 +58,11 @@ app.include_router(qag.router, prefix="/reports/qag", tags=["QAG"])
 app.include_router(qsd.router, prefix="/reports/qsd", tags=["QSD"])
 # app.include_router(qar.router, prefix="/reports/qar", tags=["QAR"])
 app.include_router(qags.router, prefix="/reports/qags", tags=["QAGS"])
+app.include_router(jobs.router, prefix="/reports/jobs", tags=["Jobs"])
+app.include_router(batch.router, prefix="/reports/batch", tags=["Lote"])
+app.include_router(historico.router, prefix="/reports/historico", tags=["Histórico"])
+app.include_router(cache.router, prefix="/cache", tags=["Cache"])
+app.include_router(metricas.router, tags=["Métricas"])
 
 
 @app.get("/", tags=["Health"])
@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from app.config import settings
+from app.schemas.batch import LoteRequest
+from app.services.lote import executar_lote, preparar_lote
+from app.dependencies import get_supabase
+
+router = APIRouter()
+
+
+@router.post("/")
+def criar_lote(lote: LoteRequest, supabase=Depends(get_supabase)):
+    """
+    Gera vários relatórios (qag, qsd, qags) de uma vez. A resposta é NDJSON:
+    uma linha ResultadoLote por item, na ordem em que cada um termina.
+    """
+    if len(lote.itens) > settings.LOTE_MAX_ITENS:
+        raise HTTPException(
+            400, detail=f"O lote aceita no máximo {settings.LOTE_MAX_ITENS} itens"
+        )
+    preparados = preparar_lote(supabase, lote)
+
+    def linhas():
+        for resultado in executar_lote(supabase, preparados):
+            yield resultado.model_dump_json() + "\n"
+
+    return StreamingResponse(linhas(), media_type="application/x-ndjson")
@@ -0,0 +1,40 @@
+from typing import Literal
+from uuid import UUID
+
+from fastapi import APIRouter
+from app.schemas.cache import CacheInvalidado
+from app.services.cache_referencias import get_cache_referencias
+from app.services.historico import invalidar_historico
+from app.services.reuso_relatorios import get_reuso_relatorios
+
+router = APIRouter()
+
+
+@router.delete("/referencias/{ativo_id}", response_model=CacheInvalidado)
+def invalidar_ativo(ativo_id: UUID):
+    """Descarta do cache o ativo e as configurações de formulário dele."""
+    versao = get_cache_referencias().invalidar(str(ativo_id))
+    return CacheInvalidado(ativo_id=str(ativo_id), versao=versao)
+
+
+@router.delete("/referencias", response_model=CacheInvalidado)
+def invalidar_referencias():
+    """Descarta todo o cache de ativos e configurações."""
+    return CacheInvalidado(removidas=get_cache_referencias().invalidar_tudo())
+
+
+@router.delete("/relatorios", response_model=CacheInvalidado)
+def limpar_relatorios():
+    """Esquece os relatórios já publicados; os próximos pedidos geram de novo."""
+    return CacheInvalidado(removidas=get_reuso_relatorios().limpar())
+
+
+@router.delete("/historico/{tipo}/{ativo_id}", response_model=CacheInvalidado)
+def invalidar_historico_ativo(tipo: Literal["qag", "qsd", "qags"], ativo_id: UUID):
+    """
+    Apaga as campanhas do ativo guardadas para o relatório histórico; use
+    quando resultados de uma campanha já gravada forem corrigidos.
+    """
+    return CacheInvalidado(
+        ativo_id=str(ativo_id), removidas=invalidar_historico(tipo, ativo_id)
+    )
@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Depends, HTTPException
+from app.schemas.historico import HistoricoRequest, HistoricoResponse
+from app.services.historico import gerar_relatorio_historico
+from app.dependencies import get_supabase
+
+router = APIRouter()
+
+
+@router.post("/", response_model=HistoricoResponse)
+def criar_historico(payload: HistoricoRequest, supabase=Depends(get_supabase)):
+    """
+    Relatório de tendência com todas as campanhas do ativo: séries
+    históricas por parâmetro e excedências do VMP por ponto.
+    """
+    try:
+        return gerar_relatorio_historico(supabase, payload)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,22 @@
+from fastapi import APIRouter, HTTPException
+from app.schemas.jobs import JobStatus
+from app.jobs.fila import get_fila
+
+router = APIRouter()
+
+@router.get("/{job_id}", response_model=JobStatus)
+def status_job(job_id: str):
+    job = get_fila().store.obter(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    return JobStatus(
+        job_id=job["id"],
+        tipo=job["tipo"],
+        status=job["status"],
+        criado_em=job["criado_em"],
+        iniciado_em=job["iniciado_em"],
+        finalizado_em=job["finalizado_em"],
+        url_relatorio=job["url_relatorio"],
+        mensagem=job["mensagem"],
+        perfil=job["perfil"],
+    )
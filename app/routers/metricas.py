@@ -0,0 +1,13 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.utils.metricas import exportar_prometheus
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metricas():
+    """Histogramas de duração e contadores no formato texto do Prometheus."""
+    return PlainTextResponse(
+        exportar_prometheus(), media_type="text/plain; version=0.0.4"
+    )
@@ -1,16 +1,44 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Union
+from fastapi import APIRouter, Depends, HTTPException, Response
+from starlette.concurrency import run_in_threadpool
 from app.schemas.qags import QAGSRequest, QAGSResponse
-from app.services.qags_service import gerar_relatorio_qags
-from app.dependencies import get_supabase
+from app.schemas.jobs import JobCriado
+from app.services.qags_service import ESPECIFICACAO, gerar_relatorio_qags_async
+from app.services.download import resposta_download
+from app.dependencies import get_supabase, get_supabase_async
+from app.jobs.fila import get_fila
 
 router = APIRouter()
 
-@router.post("/", response_model=QAGSResponse)
-def criar_qag(
+@router.post("/", response_model=Union[QAGSResponse, JobCriado])
+async def criar_qag(
     payload: QAGSRequest,
+    response: Response,
+    assincrono: bool = False,
+    profile: bool = False,
+    download: bool = False,
+    armazenar: bool = True,
     supabase = Depends(get_supabase),
+    supabase_async = Depends(get_supabase_async),
 ):
+    if profile and not assincrono:
+        # o resumo do perfil fica no registro do job
+        raise HTTPException(status_code=400, detail="profile=1 exige assincrono=1")
+    if download and assincrono:
+        raise HTTPException(status_code=400, detail="download=1 não combina com assincrono=1")
+    if assincrono:
+        # o store de jobs (SQLite) usa lock e commit: fora do event loop
+        job = await run_in_threadpool(
+            get_fila().enfileirar, "qags", supabase, payload, perfil=profile
+        )
+        response.status_code = 202
+        return JobCriado(job_id=job["id"], status=job["status"])
     try:
-        return gerar_relatorio_qags(supabase, payload)
+        if download:
+            # .docx na própria resposta; upload e registro em segundo plano
+            return await run_in_threadpool(
+                resposta_download, ESPECIFICACAO, supabase, payload, armazenar
+            )
+        return await gerar_relatorio_qags_async(supabase_async, payload)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
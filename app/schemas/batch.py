@@ -0,0 +1,31 @@
+# app/schemas/batch.py
+from uuid import UUID
+from datetime import date
+from typing import List, Literal, Optional
+from pydantic import BaseModel, Field
+
+
+class ItemLote(BaseModel):
+    tipo: Literal["qag", "qsd", "qags"]
+    ativo_id: UUID
+    data_campanha: date
+    periodicidade: str
+    descricao_relatorio: str = ""
+    nome_relatorio: Optional[str] = None  # usa o nome padrão de cada tipo
+
+
+class LoteRequest(BaseModel):
+    user_id: UUID
+    itens: List[ItemLote] = Field(..., min_length=1)
+
+
+class ResultadoLote(BaseModel):
+    """Uma linha do NDJSON devolvido por POST /reports/batch."""
+
+    indice: int  # posição do item na requisição
+    tipo: str
+    ativo_id: UUID
+    data_campanha: date
+    sucesso: bool
+    mensagem: str
+    url_relatorio: Optional[str] = None
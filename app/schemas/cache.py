@@ -0,0 +1,9 @@
+# app/schemas/cache.py
+from typing import Optional
+from pydantic import BaseModel
+
+
+class CacheInvalidado(BaseModel):
+    ativo_id: Optional[str] = None
+    versao: Optional[int] = None  # nova versão do ativo invalidado
+    removidas: Optional[int] = None  # entradas descartadas (invalidação total)
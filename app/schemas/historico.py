@@ -0,0 +1,37 @@
+# app/schemas/historico.py
+from uuid import UUID
+from datetime import date
+from typing import List, Literal, Optional
+from pydantic import BaseModel
+
+
+class HistoricoRequest(BaseModel):
+    tipo: Literal["qag", "qsd", "qags"]
+    ativo_id: UUID
+    user_id: UUID
+    parametros: Optional[List[str]] = None  # padrão: todos os que têm VMP
+    nome_relatorio: str = "Relatório de Tendência Histórica"
+    descricao_relatorio: str = ""
+
+
+class EstatisticaParametro(BaseModel):
+    ponto: str
+    parametro: str
+    campanhas: int
+    avaliados: int
+    excedencias: int
+    percentual_excedencia: Optional[float] = None  # None se nada pôde ser avaliado
+    minimo: Optional[float] = None
+    maximo: Optional[float] = None
+    media: Optional[float] = None
+    tendencia_ano: Optional[float] = None  # inclinação da reta, por ano
+    ultima_campanha: date
+    ultimo_valor: Optional[float] = None
+
+
+class HistoricoResponse(BaseModel):
+    mensagem: str
+    sucesso: bool
+    url_relatorio: Optional[str] = None
+    campanhas: List[date] = []
+    estatisticas: List[EstatisticaParametro] = []
@@ -0,0 +1,20 @@
+# app/schemas/jobs.py
+from typing import Optional
+from pydantic import BaseModel
+
+
+class JobCriado(BaseModel):
+    job_id: str
+    status: str
+
+
+class JobStatus(BaseModel):
+    job_id: str
+    tipo: str
+    status: str  # queued | running | done | failed
+    criado_em: str
+    iniciado_em: Optional[str] = None
+    finalizado_em: Optional[str] = None
+    url_relatorio: Optional[str] = None
+    mensagem: Optional[str] = None
+    perfil: Optional[str] = None  # resumo do cProfile, com ?profile=1
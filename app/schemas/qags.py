@@ -1,6 +1,7 @@
 # app/schemas/qsd.py
 from uuid import UUID
 from datetime import date
+from typing import Optional
 from pydantic import BaseModel, Field
 
 
@@ -18,3 +19,4 @@ class QAGSRequest(BaseModel):
 class QAGSResponse(BaseModel):
     mensagem: str
     sucesso: bool
+    url_relatorio: Optional[str] = None
@@ -1,6 +1,7 @@
 # app/schemas/qsd.py
 from uuid import UUID
 from datetime import date
+from typing import Optional
 from pydantic import BaseModel, Field
 
 
@@ -16,3 +17,4 @@ class QSDRequest(BaseModel):
 class QSDResponse(BaseModel):
     mensagem: str
     sucesso: bool
+    url_relatorio: Optional[str] = None
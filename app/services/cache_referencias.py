@@ -0,0 +1,151 @@
+# app/services/cache_referencias.py
+import asyncio
+import copy
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Optional
+
+from app.config import settings
+
+
+class CacheReferencias:
+    """
+    Cache read-through, com TTL, das linhas de tabelas que quase não mudam
+    (`ativos` e `configuracao_formulario_ativos`).
+
+    - Cada ativo tem um número de versão; invalidar o ativo incrementa a
+      versão e descarta todas as entradas dele. Uma carga que estava em
+      andamento durante a invalidação não é guardada.
+    - Pedidos simultâneos pela mesma chave esperam uma única consulta.
+    - Registros não encontrados (None) não são guardados.
+    """
+
+    def __init__(self, ttl: int, max_entradas: int):
+        self._ttl = ttl
+        self._max_entradas = max_entradas
+        self._entradas = OrderedDict()  # chave -> (versão, expira_em, valor)
+        self._versoes = {}  # ativo_id -> versão
+        self._geracao = 0  # incrementada por invalidar_tudo
+        self._carregando = {}  # chave -> Future
+        self._lock = threading.Lock()
+
+    def _versao(self, ativo_id: str) -> tuple:
+        return self._geracao, self._versoes.get(ativo_id, 0)
+
+    def _inserir(self, chave: tuple, versao: tuple, valor: dict) -> None:
+        # chamado com o lock adquirido
+        self._entradas[chave] = (versao, time.monotonic() + self._ttl, valor)
+        self._entradas.move_to_end(chave)
+        while len(self._entradas) > self._max_entradas:
+            self._entradas.popitem(last=False)
+
+    def _reservar(self, ativo_id: str, chave: tuple) -> tuple:
+        """(valor em cache ou None, versão, Future da carga, se é o dono)."""
+        with self._lock:
+            versao = self._versao(ativo_id)
+            entrada = self._entradas.get(chave)
+            if entrada and entrada[0] == versao and entrada[1] > time.monotonic():
+                self._entradas.move_to_end(chave)
+                return copy.deepcopy(entrada[2]), versao, None, False
+            futuro = self._carregando.get(chave)
+            dono = futuro is None
+            if dono:
+                futuro = self._carregando[chave] = Future()
+            return None, versao, futuro, dono
+
+    def _concluir(self, ativo_id: str, chave: tuple, versao: tuple, futuro, valor):
+        with self._lock:
+            self._carregando.pop(chave, None)
+            if valor is not None and self._versao(ativo_id) == versao:
+                self._inserir(chave, versao, valor)
+        futuro.set_result(valor)
+        return copy.deepcopy(valor)
+
+    def _falhar(self, chave: tuple, futuro, erro: BaseException) -> None:
+        with self._lock:
+            self._carregando.pop(chave, None)
+        futuro.set_exception(erro)
+
+    def obter(
+        self, ativo_id: str, chave: tuple, carregar: Callable[[], Optional[dict]]
+    ):
+        """
+        Devolve uma cópia do valor em cache para `chave` (cujo segundo item
+        é o `ativo_id`) ou chama `carregar()` e guarda o resultado.
+        """
+        valor, versao, futuro, dono = self._reservar(ativo_id, chave)
+        if futuro is None:
+            return valor
+        if not dono:
+            return copy.deepcopy(futuro.result())
+        try:
+            valor = carregar()
+        except BaseException as e:
+            self._falhar(chave, futuro, e)
+            raise
+        return self._concluir(ativo_id, chave, versao, futuro, valor)
+
+    async def obter_async(
+        self, ativo_id: str, chave: tuple, carregar: Callable[[], Awaitable]
+    ):
+        """
+        Como `obter`, com `carregar` assíncrono. Espera sem bloquear o event
+        loop, inclusive por uma carga iniciada por `obter` em outra thread.
+        """
+        valor, versao, futuro, dono = self._reservar(ativo_id, chave)
+        if futuro is None:
+            return valor
+        if not dono:
+            return copy.deepcopy(await asyncio.wrap_future(futuro))
+        try:
+            valor = await carregar()
+        except BaseException as e:
+            self._falhar(chave, futuro, e)
+            raise
+        return self._concluir(ativo_id, chave, versao, futuro, valor)
+
+    def versoes(self, ativo_ids) -> dict:
+        """Versão atual de cada ativo, a anotar antes de consultar o banco."""
+        with self._lock:
+            return {ativo_id: self._versao(ativo_id) for ativo_id in ativo_ids}
+
+    def guardar(self, ativo_id: str, chave: tuple, versao: tuple, valor: dict) -> None:
+        """
+        Guarda um valor já consultado (ex.: pela busca em lote). `versao` é
+        a de `versoes` antes da consulta; se o ativo foi invalidado depois
+        dela, o valor pode estar velho e não é guardado.
+        """
+        with self._lock:
+            if self._versao(ativo_id) == versao:
+                self._inserir(chave, versao, valor)
+
+    def invalidar(self, ativo_id: str) -> int:
+        """Descarta as entradas do ativo e devolve a nova versão."""
+        with self._lock:
+            versao = self._versoes.get(ativo_id, 0) + 1
+            self._versoes[ativo_id] = versao
+            for chave in [c for c in self._entradas if c[1] == ativo_id]:
+                del self._entradas[chave]
+            return versao
+
+    def invalidar_tudo(self) -> int:
+        """Descarta todas as entradas e devolve quantas foram removidas."""
+        with self._lock:
+            removidas = len(self._entradas)
+            self._geracao += 1
+            self._entradas.clear()
+            return removidas
+
+
+_cache = None
+
+
+def get_cache_referencias() -> CacheReferencias:
+    global _cache
+    if not _cache:
+        _cache = CacheReferencias(
+            settings.REFERENCIAS_CACHE_TTL, settings.REFERENCIAS_CACHE_MAX
+        )
+    return _cache
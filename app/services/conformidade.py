@@ -0,0 +1,110 @@
+# app/services/conformidade.py
+import numpy as np
+import pandas as pd
+
+from app.services.vmps.limites import (
+    COLUNA_PH,
+    FAIXA,
+    MAXIMO,
+    POR_PH,
+    LimitesCompilados,
+)
+
+
+def avaliar_conformidade(
+    df: pd.DataFrame,
+    limites: LimitesCompilados,
+    coluna_classe: str = "Classe",
+    coluna_ph: str = COLUNA_PH,
+    manter: tuple = (),
+) -> pd.DataFrame:
+    """
+    Compara todos os resultados do DataFrame com os VMPs compilados da classe
+    de cada linha de uma só vez.
+
+    Devolve uma tabela com uma linha por (amostra, parâmetro listado para a
+    classe): Ponto, <coluna_classe>, Parametro, Valor, VMP e Conforme.
+    `Valor` mantém o conteúdo original da célula e `VMP` o limite aplicado.
+    As colunas de `manter` (ex.: Profundidade) são copiadas de cada amostra
+    logo após a classe.
+    Faixas (pH) são avaliadas nos dois extremos e o nitrogênio amoniacal
+    usa a banda do pH da amostra. `Conforme` é None quando o valor não é
+    numérico ou o limite não é avaliável (qualitativo, ausente ou sem pH).
+    Cada seção do relatório filtra essa tabela pelos parâmetros que lhe
+    interessam.
+    """
+    # 1) Amostras de classes conhecidas x parâmetros com VMP
+    parametros = [c for c in df.columns if c in limites.idx_parametro]
+    c = df[coluna_classe].map(limites.idx_classe).to_numpy(dtype=float, na_value=np.nan)
+    linhas = ~np.isnan(c)
+    c = c[linhas].astype(np.intp)
+    p = np.array([limites.idx_parametro[x] for x in parametros], dtype=np.intp)
+    dados = df.loc[linhas, parametros]
+
+    originais = dados.to_numpy(dtype=object)
+    # medidas já tipadas na leitura dos resultados não são convertidas de novo
+    texto = [x for x in parametros if not pd.api.types.is_numeric_dtype(dados[x])]
+    if texto:
+        dados = dados.assign(**dados[texto].apply(pd.to_numeric, errors="coerce"))
+    valores = dados.to_numpy(dtype=float, na_value=np.nan)
+    if coluna_ph in df.columns:
+        ph = pd.to_numeric(df.loc[linhas, coluna_ph], errors="coerce").to_numpy(
+            dtype=float, na_value=np.nan
+        )
+    else:
+        ph = np.full(len(c), np.nan)
+
+    # 2) Limites de cada célula por indexação dos arrays compilados
+    cc, pp = c[:, None], p[None, :]
+    existe = limites.existe[cc, pp]
+    tipo = limites.tipo[cc, pp]
+    na_banda = (limites.ph_min[cc, pp] <= ph[:, None, None]) & (
+        ph[:, None, None] <= limites.ph_max[cc, pp]
+    )
+    banda = np.where(tipo == POR_PH, na_banda.argmax(axis=-1), 0)
+    tem_banda = (tipo != POR_PH) | na_banda.any(axis=-1)
+    minimo = np.take_along_axis(limites.minimo[cc, pp], banda[..., None], -1)[..., 0]
+    maximo = np.take_along_axis(limites.maximo[cc, pp], banda[..., None], -1)[..., 0]
+
+    avaliavel = (
+        np.isin(tipo, (MAXIMO, FAIXA, POR_PH)) & tem_banda & ~np.isnan(valores)
+    )
+    conforme = np.full(valores.shape, None, dtype=object)
+    conforme[avaliavel] = (minimo[avaliavel] <= valores[avaliavel]) & (
+        valores[avaliavel] <= maximo[avaliavel]
+    )
+
+    vmp = limites.original[cc, pp]
+    por_ph = (tipo == POR_PH) & tem_banda
+    vmp[por_ph] = maximo[por_ph]
+    vmp[(tipo == POR_PH) & ~tem_banda] = None
+
+    # 3) Formato longo, só com os pares listados para a classe
+    i, j = np.nonzero(existe)
+    return pd.DataFrame(
+        {
+            "Ponto": df.loc[linhas, "Ponto"].to_numpy()[i],
+            coluna_classe: df.loc[linhas, coluna_classe].to_numpy()[i],
+            **{coluna: df.loc[linhas, coluna].to_numpy()[i] for coluna in manter},
+            "Parametro": np.asarray(parametros, dtype=object)[j],
+            "Valor": originais[i, j],
+            "VMP": vmp[i, j],
+            "Conforme": conforme[i, j],
+        }
+    )
+
+
+def percentual_conforme(df_conformidade: pd.DataFrame, parametros=None):
+    """
+    Percentual de resultados conformes entre os que puderam ser avaliados,
+    opcionalmente restrito a uma lista de parâmetros. Devolve "Indisponível"
+    se nenhum resultado pôde ser avaliado.
+    """
+    if parametros is not None:
+        df_conformidade = df_conformidade[
+            df_conformidade["Parametro"].isin(parametros)
+        ]
+    avaliados = df_conformidade["Conforme"].dropna()
+    if avaliados.empty:
+        return "Indisponível"
+    return avaliados.astype(bool).mean() * 100
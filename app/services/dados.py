@@ -0,0 +1,250 @@
+# app/services/dados.py
+import asyncio
+import copy
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import List
+from uuid import UUID
+
+from fastapi import HTTPException
+from supabase import AsyncClient, Client
+
+from app.services.cache_referencias import get_cache_referencias
+
+# Colunas realmente usadas pelos relatórios (evita trafegar select("*"))
+COLUNAS_ATIVO = ["nome", "cnpj", "endereco", "numero_licenca", "orgao_regulador"]
+COLUNAS_CONFIGURACAO = [
+    "localizacao_dos_pontos_de_monitoramento",
+    "parametro_periodicidade",
+    "dados_laboratoriais",
+]
+COLUNAS_LABORATORIO = [
+    "campanha_de_coleta",
+    "nome_laboratorio",
+    "razao_social_laboratorio",
+    "cnpj_laboratorio",
+    "endereco_laboratorio",
+    "responsavel_tecnico",
+    "email",
+    "contato",
+    "resultados",
+]
+
+# as três consultas de um relatório saem juntas
+_executor = ThreadPoolExecutor(max_workers=6, thread_name_prefix="supabase")
+
+
+@dataclass(frozen=True)
+class DadosRelatorio:
+    """Linhas do Supabase usadas para montar um relatório."""
+
+    ativo: dict
+    configuracao: dict
+    campanha: dict
+
+
+def _primeira_linha(consulta) -> dict:
+    resposta = consulta.execute()
+    return resposta.data[0] if resposta.data else None
+
+
+def carregar_ativo(supabase: Client, ativo_id: UUID) -> dict:
+    """Linha do ativo (COLUNAS_ATIVO), via cache de referências, ou None."""
+    ativo_id = str(ativo_id)
+    consulta = supabase.table("ativos").select(*COLUNAS_ATIVO).eq("id", ativo_id)
+    return get_cache_referencias().obter(
+        ativo_id, ("ativos", ativo_id), partial(_primeira_linha, consulta)
+    )
+
+
+def carregar_dados(
+    supabase: Client,
+    ativo_id: UUID,
+    data_campanha: str,
+    formulario: str,
+    colunas_formulario: List[str],
+) -> DadosRelatorio:
+    """
+    Busca em paralelo o ativo, a configuração do formulário e a campanha
+    (`formulario` na data `data_campanha`), selecionando só as colunas
+    informadas. Ativo e configuração passam pelo cache de referências.
+    Levanta 404 para o primeiro registro não encontrado, na mesma ordem das
+    consultas sequenciais.
+    """
+    ativo_id = str(ativo_id)
+    cache = get_cache_referencias()
+    consulta_configuracao = (
+        supabase.table("configuracao_formulario_ativos")
+        .select(*COLUNAS_CONFIGURACAO)
+        .eq("ativo_id", ativo_id)
+        .eq("tipo_formulario", formulario)
+    )
+    consulta_campanha = (
+        supabase.table(formulario)
+        .select(*colunas_formulario)
+        .eq("ativo_id", ativo_id)
+        .eq("campanha_de_coleta", data_campanha)
+    )
+    futuros = [
+        _executor.submit(carregar_ativo, supabase, ativo_id),
+        _executor.submit(
+            cache.obter,
+            ativo_id,
+            ("configuracao", ativo_id, formulario),
+            partial(_primeira_linha, consulta_configuracao),
+        ),
+        _executor.submit(_primeira_linha, consulta_campanha),
+    ]
+    return _montar(*[futuro.result() for futuro in futuros])
+
+
+def _montar(ativo, configuracao, campanha) -> DadosRelatorio:
+    if not ativo:
+        raise HTTPException(404, detail="Ativo não encontrado")
+    if not configuracao:
+        raise HTTPException(404, detail="Configuração do formulário não encontrada")
+    if not campanha:
+        raise HTTPException(404, detail="Campanha não encontrada")
+    return DadosRelatorio(ativo=ativo, configuracao=configuracao, campanha=campanha)
+
+
+async def _primeira_linha_async(consulta) -> dict:
+    resposta = await consulta.execute()
+    return resposta.data[0] if resposta.data else None
+
+
+async def carregar_dados_async(
+    supabase: AsyncClient,
+    ativo_id: UUID,
+    data_campanha: str,
+    formulario: str,
+    colunas_formulario: List[str],
+) -> DadosRelatorio:
+    """
+    Versão de `carregar_dados` para o cliente assíncrono: as três consultas
+    saem juntas sem ocupar threads. Usa o mesmo cache de referências e
+    levanta os mesmos 404.
+    """
+    ativo_id = str(ativo_id)
+    cache = get_cache_referencias()
+    consulta_ativo = supabase.table("ativos").select(*COLUNAS_ATIVO).eq("id", ativo_id)
+    consulta_configuracao = (
+        supabase.table("configuracao_formulario_ativos")
+        .select(*COLUNAS_CONFIGURACAO)
+        .eq("ativo_id", ativo_id)
+        .eq("tipo_formulario", formulario)
+    )
+    consulta_campanha = (
+        supabase.table(formulario)
+        .select(*colunas_formulario)
+        .eq("ativo_id", ativo_id)
+        .eq("campanha_de_coleta", data_campanha)
+    )
+    linhas = await asyncio.gather(
+        cache.obter_async(
+            ativo_id,
+            ("ativos", ativo_id),
+            partial(_primeira_linha_async, consulta_ativo),
+        ),
+        cache.obter_async(
+            ativo_id,
+            ("configuracao", ativo_id, formulario),
+            partial(_primeira_linha_async, consulta_configuracao),
+        ),
+        _primeira_linha_async(consulta_campanha),
+    )
+    return _montar(*linhas)
+
+
+def _linhas(consulta) -> list:
+    return consulta.execute().data or []
+
+
+def carregar_dados_lote(supabase: Client, pedidos: List[tuple]) -> dict:
+    """
+    Versão em lote de `carregar_dados` para vários relatórios de uma vez.
+
+    `pedidos` é uma lista de (formulario, colunas_formulario, ativo_id,
+    data_campanha). Faz uma consulta filtrada por `in_` para `ativos`, uma
+    para `configuracao_formulario_ativos` e uma por formulário, todas em
+    paralelo, e alimenta o cache de referências com o que veio.
+
+    Devolve {(formulario, ativo_id, data_campanha): DadosRelatorio}; pedidos
+    sem ativo, configuração ou campanha recebem a HTTPException 404 que
+    `carregar_dados` levantaria.
+    """
+    pedidos = [(f, c, str(a), d) for f, c, a, d in pedidos]
+    ativo_ids = sorted({a for _, _, a, _ in pedidos})
+    por_formulario = {}  # formulario -> (colunas, ativo_ids, datas)
+    for formulario, colunas, ativo_id, data in pedidos:
+        _, ids, datas = por_formulario.setdefault(formulario, (colunas, set(), set()))
+        ids.add(ativo_id)
+        datas.add(data)
+
+    # 1) Consultas em lote, em paralelo; as versões no cache são anotadas
+    #    antes, para não guardar linhas de um ativo invalidado no meio delas
+    cache = get_cache_referencias()
+    versoes = cache.versoes(ativo_ids)
+    futuro_ativos = _executor.submit(
+        _linhas,
+        supabase.table("ativos").select("id", *COLUNAS_ATIVO).in_("id", ativo_ids),
+    )
+    futuro_configuracoes = _executor.submit(
+        _linhas,
+        supabase.table("configuracao_formulario_ativos")
+        .select("ativo_id", "tipo_formulario", *COLUNAS_CONFIGURACAO)
+        .in_("ativo_id", ativo_ids)
+        .in_("tipo_formulario", list(por_formulario)),
+    )
+    futuros_campanhas = {
+        formulario: _executor.submit(
+            _linhas,
+            supabase.table(formulario)
+            .select(*dict.fromkeys(["ativo_id", *colunas]))
+            .in_("ativo_id", sorted(ids))
+            .in_("campanha_de_coleta", sorted(datas)),
+        )
+        for formulario, (colunas, ids, datas) in por_formulario.items()
+    }
+
+    # 2) Indexa a primeira linha de cada chave, como `.data[0]`
+    ativos, configuracoes, campanhas = {}, {}, {}
+    for linha in futuro_ativos.result():
+        ativos.setdefault(str(linha["id"]), {c: linha.get(c) for c in COLUNAS_ATIVO})
+    for linha in futuro_configuracoes.result():
+        configuracoes.setdefault(
+            (str(linha["ativo_id"]), linha["tipo_formulario"]),
+            {c: linha.get(c) for c in COLUNAS_CONFIGURACAO},
+        )
+    for formulario, futuro in futuros_campanhas.items():
+        colunas = por_formulario[formulario][0]
+        for linha in futuro.result():
+            campanhas.setdefault(
+                (formulario, str(linha["ativo_id"]), str(linha["campanha_de_coleta"])),
+                {c: linha.get(c) for c in colunas},
+            )
+
+    # 3) Alimenta o cache de referências
+    for ativo_id, ativo in ativos.items():
+        cache.guardar(ativo_id, ("ativos", ativo_id), versoes.get(ativo_id), ativo)
+    for (ativo_id, formulario), configuracao in configuracoes.items():
+        cache.guardar(
+            ativo_id,
+            ("configuracao", ativo_id, formulario),
+            versoes.get(ativo_id),
+            configuracao,
+        )
+
+    # 4) Resultado por pedido
+    resultado = {}
+    for formulario, _, ativo_id, data in pedidos:
+        try:
+            resultado[(formulario, ativo_id, data)] = _montar(
+                copy.deepcopy(ativos.get(ativo_id)),
+                copy.deepcopy(configuracoes.get((ativo_id, formulario))),
+                campanhas.get((formulario, ativo_id, data)),
+            )
+        except HTTPException as e:
+            resultado[(formulario, ativo_id, data)] = e
+    return resultado
@@ -0,0 +1,166 @@
+# app/services/download.py
+import io
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi.responses import StreamingResponse
+from supabase import Client
+
+from app.services.especificacao import EspecificacaoRelatorio
+from app.services.motor import (
+    armazenar_relatorio,
+    dados_relatorio,
+    registrar_relatorio,
+    renderizar_relatorio,
+    url_publica,
+)
+from app.services.reuso_relatorios import (
+    Publicacao,
+    chave_relatorio,
+    get_reuso_relatorios,
+    registro_pedido,
+)
+from app.utils.file_utils import (
+    DOCX_CONTENT_TYPE,
+    copiar_docx,
+    iterar_docx,
+    salvar_docx,
+)
+from app.utils.metricas import contador
+
+logger = logging.getLogger(__name__)
+
+# upload e registro dos downloads rodam aqui, fora do ciclo da resposta:
+# terminam mesmo se o cliente desconectar no meio do envio
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="download")
+
+_ERROS_ARMAZENAMENTO = contador(
+    "relatorio_download_armazenamento_erros_total",
+    "Downloads cujo upload ou registro em segundo plano falhou.",
+)
+
+
+def _registrar_falha(especificacao, object_key, erro) -> None:
+    _ERROS_ARMAZENAMENTO.incrementar(relatorio=especificacao.tipo)
+    logger.error("Falha ao armazenar o download %s: %s", object_key, erro)
+
+
+def _armazenar(
+    especificacao, supabase, payload, object_key, public_url, arquivo, chave, futuro
+) -> None:
+    # upload e registro do documento gerado; conclui a reserva do reuso
+    reuso = get_reuso_relatorios()
+    try:
+        resposta = armazenar_relatorio(
+            especificacao, supabase, payload, object_key, arquivo
+        )
+    except Exception as e:
+        reuso.falhar(chave, futuro, e)
+        _registrar_falha(especificacao, object_key, repr(e))
+        return
+    finally:
+        arquivo.close()
+    reuso.concluir(
+        chave,
+        futuro,
+        Publicacao(object_key, public_url, registro_pedido(payload), resposta),
+    )
+    if not resposta.sucesso:
+        _registrar_falha(especificacao, object_key, resposta.mensagem)
+
+
+def _registrar(especificacao, supabase, payload, publicacao) -> None:
+    # documento de outro pedido: só o registro em nome deste
+    try:
+        resposta = registrar_relatorio(
+            especificacao, supabase, payload, publicacao.public_url
+        )
+        erro = None if resposta.sucesso else resposta.mensagem
+    except Exception as e:
+        erro = repr(e)
+    if erro is not None:
+        _registrar_falha(especificacao, publicacao.object_key, erro)
+
+
+def _blocos(arquivo):
+    # fecha o buffer ao terminar, em erro ou quando a resposta é abandonada
+    try:
+        yield from iterar_docx(arquivo)
+    finally:
+        arquivo.close()
+
+
+def _resposta(especificacao, payload, arquivo, public_url=None) -> StreamingResponse:
+    nome = f"relatorio_{especificacao.tipo}_{payload.data_campanha.isoformat()}.docx"
+    headers = {"Content-Disposition": f'attachment; filename="{nome}"'}
+    if public_url:
+        headers["X-Relatorio-Url"] = public_url
+    return StreamingResponse(
+        _blocos(arquivo), media_type=DOCX_CONTENT_TYPE, headers=headers
+    )
+
+
+def resposta_download(
+    especificacao: EspecificacaoRelatorio, supabase: Client, payload, armazenar: bool
+) -> StreamingResponse:
+    """
+    Gera o relatório e devolve o .docx direto na resposta HTTP, em blocos
+    (chunked). Com `armazenar`, uma cópia do arquivo vai ao bucket e é
+    registrada no banco em paralelo ao envio, mesmo que o cliente desconecte;
+    o cabeçalho X-Relatorio-Url traz a URL pública onde ele ficará.
+
+    Com `armazenar`, pedidos com a mesma chave de `gerar_relatorio` (ver
+    ReusoRelatorios) compartilham o documento publicado: quem chega durante
+    ou depois da geração recebe o .docx do bucket, registrado em seu nome se
+    não for a repetição exata do pedido que o gerou.
+    """
+    # 1) Dados primeiro: o conteúdo da campanha faz parte da chave
+    dados = dados_relatorio(especificacao, supabase, payload)
+    if not armazenar:
+        _, document = renderizar_relatorio(especificacao, supabase, payload, dados)
+        return _resposta(especificacao, payload, salvar_docx(document))
+
+    # 2) Documento já publicado (ou em publicação) por outro pedido
+    chave = chave_relatorio(especificacao, payload, dados)
+    reuso = get_reuso_relatorios()
+    publicacao, futuro, dono = reuso.reservar(chave)
+    if not dono:
+        if publicacao is None:
+            publicacao = futuro.result()
+        conteudo = supabase.storage.from_(especificacao.bucket).download(
+            publicacao.object_key
+        )
+        if publicacao.registro != registro_pedido(payload):
+            _executor.submit(_registrar, especificacao, supabase, payload, publicacao)
+        return _resposta(
+            especificacao, payload, io.BytesIO(conteudo), publicacao.public_url
+        )
+
+    # 3) Documento renderizado e salvo uma única vez
+    arquivo = None
+    try:
+        object_key, document = renderizar_relatorio(
+            especificacao, supabase, payload, dados
+        )
+        arquivo = salvar_docx(document)
+        public_url = url_publica(especificacao, supabase, object_key)
+        copia = copiar_docx(arquivo)
+    except BaseException as e:
+        if arquivo is not None:
+            arquivo.close()
+        reuso.falhar(chave, futuro, e)
+        raise
+
+    # 4) Upload e registro seguem por conta própria, com a sua cópia do arquivo
+    _executor.submit(
+        _armazenar,
+        especificacao,
+        supabase,
+        payload,
+        object_key,
+        public_url,
+        copia,
+        chave,
+        futuro,
+    )
+    return _resposta(especificacao, payload, arquivo, public_url)
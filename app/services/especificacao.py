@@ -0,0 +1,254 @@
+# app/services/especificacao.py
+from dataclasses import dataclass
+from typing import Optional
+
+from app.services.resultados import EsquemaResultados
+from app.services.vmps.limites import LimitesCompilados
+
+# Formato declarativo de um relatório: cada seção é um dataclass imutável
+# com a chave do template que ela preenche (ex.: "QAG_27") e os parâmetros
+# de que precisa. O motor (app/services/motor.py) interpreta as seções;
+# um novo template só precisa de uma EspecificacaoRelatorio.
+
+
+# --- Valores simples ---
+
+
+@dataclass(frozen=True)
+class Fixo:
+    """Valor constante (listas de parâmetros, textos, indicadores)."""
+
+    chave: str
+    valor: object
+
+
+@dataclass(frozen=True)
+class Campo:
+    """
+    Coluna de uma das linhas do relatório. `fonte` é "ativo",
+    "configuracao", "campanha", "laboratorio" (primeiro item de
+    configuracao["dados_laboratoriais"]) ou "payload".
+    """
+
+    chave: str
+    fonte: str
+    coluna: str
+
+
+@dataclass(frozen=True)
+class DataCampanha:
+    """Data da campanha com `formato` do strftime, ou "extenso" (mês)."""
+
+    chave: str
+    formato: str
+
+
+@dataclass(frozen=True)
+class DataGeracao:
+    """Atributo (day, year...) da data em que o relatório é gerado."""
+
+    chave: str
+    atributo: str
+
+
+@dataclass(frozen=True)
+class NumeroPontos:
+    chave: str
+
+
+@dataclass(frozen=True)
+class ValoresUnicos:
+    """Valores distintos de uma coluna de `resultados`, na ordem em que aparecem."""
+
+    chave: str
+    coluna: str
+
+
+@dataclass(frozen=True)
+class MediaPorAmostra:
+    """Soma da coluna dividida pelo número de amostras."""
+
+    chave: str
+    coluna: str
+
+
+# --- Anexos ---
+
+
+@dataclass(frozen=True)
+class Foto:
+    """Primeira foto da coluna da campanha, baixada junto com as demais."""
+
+    chave: str
+    coluna: str
+    largura_cm: float = 5
+
+
+@dataclass(frozen=True)
+class Laudo:
+    """Link para o primeiro laudo da coluna da campanha."""
+
+    chave: str
+    coluna: str
+    cor: str = "#1281F0"
+
+
+# --- Tabelas e conformidade ---
+
+
+@dataclass(frozen=True)
+class TabelaPorPonto:
+    """Tabela de resultados por ponto (`tabela_por_ponto`) com as `colunas`."""
+
+    chave: str
+    colunas: tuple
+
+
+@dataclass(frozen=True)
+class TabelaMedias:
+    """Tabela "Parâmetro x Média" (total, superfície, meio e fundo)."""
+
+    chave: str
+    parametros: tuple
+
+
+@dataclass(frozen=True)
+class PercentualConforme:
+    """Percentual de resultados conformes (todos os parâmetros se None)."""
+
+    chave: str
+    parametros: Optional[tuple] = None
+
+
+@dataclass(frozen=True)
+class TabelaConformidade:
+    """
+    Valores por ponto (uma linha por ponto, uma coluna por parâmetro), como
+    lista de dicionários para um loop do template. `colunas` mapeia cada
+    parâmetro para o nome usado no template. `destaque` marca os valores
+    fora do VMP: None (valor como veio), "vermelho" (texto em vermelho) ou
+    "sufixo" (texto seguido de " Inconforme!"). `categorias` são colunas de
+    `resultados` copiadas para cada ponto (ex.: Toxicidade).
+    """
+
+    chave: str
+    colunas: dict
+    destaque: Optional[str] = None
+    categorias: tuple = ()
+
+
+@dataclass(frozen=True)
+class TabelaIndicadores:
+    """
+    Indicadores com o resultado "Alcançado"/"Não Alcançado" da campanha,
+    avaliados só nos resultados de `parametros` (todos, se vazio).
+    """
+
+    chave: str
+    indicadores: list
+    parametros: tuple = ()
+
+
+@dataclass(frozen=True)
+class PercentualPontos:
+    """
+    Percentual dos pontos com resultados para `parametros` em que a coluna
+    `coluna` de `resultados` vale `valor`.
+    """
+
+    chave: str
+    coluna: str
+    valor: str
+    parametros: tuple
+
+
+# --- Gráficos ---
+
+
+@dataclass(frozen=True)
+class GraficosQualidadeAgua:
+    """
+    Um gráfico por classe e parâmetro (médias por ponto e profundidade e
+    VMP). Os de todas as seções são desenhados em um único lote no pool.
+    """
+
+    chave: str
+    parametros: tuple
+    vmp: dict
+
+
+@dataclass(frozen=True)
+class GraficoGranulometria:
+    chave: str
+    colunas: tuple
+    largura_cm: float = 14
+
+
+@dataclass(frozen=True)
+class GraficosLinhaPorClasse:
+    """Um gráfico de linha por parâmetro, com o VMP de cada classe."""
+
+    chave: str
+    parametros: tuple
+    vmp: dict
+
+
+@dataclass(frozen=True)
+class EspecificacaoRelatorio:
+    """
+    Tudo o que diferencia um tipo de relatório: de onde vêm os dados
+    (`formulario`, `colunas_formulario`, `esquema`), como a conformidade é
+    avaliada (`limites`, `coluna_classe`), o template, as seções que
+    preenchem o contexto e onde o .docx é gravado e registrado.
+    `medidas_inteiras` converte para Int64 as medidas sem casas decimais em
+    nenhuma amostra (exibidas sem ".0").
+    """
+
+    tipo: str
+    template: str
+    formulario: str
+    colunas_formulario: list
+    esquema: EsquemaResultados
+    limites: LimitesCompilados
+    bucket: str
+    tipo_relatorio: str
+    resposta: type
+    secoes: tuple
+    coluna_classe: str = "Classe"
+    medidas_inteiras: bool = False
+
+
+def cabecalho(prefixo: str) -> tuple:
+    """
+    Seções comuns a todos os templates: ativo, datas, pontos, configuração
+    do formulário e laboratório (chaves <prefixo>_01 a <prefixo>_20_7).
+    """
+    return (
+        Campo(f"{prefixo}_01", "ativo", "nome"),
+        Campo(f"{prefixo}_02", "campanha", "campanha_de_coleta"),
+        DataCampanha(f"{prefixo}_03", "%m"),
+        DataCampanha(f"{prefixo}_04", "%Y"),
+        Fixo(f"{prefixo}_05", "Florianópolis"),
+        DataGeracao(f"{prefixo}_06", "day"),
+        DataCampanha(f"{prefixo}_07", "extenso"),
+        DataGeracao(f"{prefixo}_08", "year"),
+        Campo(f"{prefixo}_09", "ativo", "nome"),
+        Campo(f"{prefixo}_10", "ativo", "cnpj"),
+        Campo(f"{prefixo}_11", "ativo", "endereco"),
+        Campo(f"{prefixo}_12", "ativo", "nome"),
+        Campo(f"{prefixo}_13", "ativo", "numero_licenca"),
+        NumeroPontos(f"{prefixo}_14"),
+        Campo(f"{prefixo}_15", "ativo", "orgao_regulador"),
+        Campo(f"{prefixo}_16", "ativo", "endereco"),
+        Campo(
+            f"{prefixo}_18", "configuracao", "localizacao_dos_pontos_de_monitoramento"
+        ),
+        Campo(f"{prefixo}_19", "configuracao", "parametro_periodicidade"),
+        Campo(f"{prefixo}_20_1", "campanha", "nome_laboratorio"),
+        Campo(f"{prefixo}_20_2", "campanha", "razao_social_laboratorio"),
+        Campo(f"{prefixo}_20_3", "campanha", "cnpj_laboratorio"),
+        Campo(f"{prefixo}_20_4", "campanha", "endereco_laboratorio"),
+        Campo(f"{prefixo}_20_5", "campanha", "responsavel_tecnico"),
+        Campo(f"{prefixo}_20_6", "campanha", "email"),
+        Campo(f"{prefixo}_20_7", "campanha", "contato"),
+    )
@@ -0,0 +1,80 @@
+# app/services/estatisticas.py
+from dataclasses import dataclass
+
+import pandas as pd
+
+TOTAL = "Total"
+AGREGADOS = {"mean": "media", "min": "minimo", "max": "maximo", "count": "n"}
+
+
+@dataclass(frozen=True)
+class EstatisticasCampanha:
+    """
+    Agregados de uma campanha, calculados uma vez por relatório.
+
+    `por_profundidade` tem índice (Parametro, Profundidade), com
+    Profundidade "Total" para todas as amostras, e colunas media, minimo,
+    maximo, n (resultados numéricos) e excedencias (resultados fora do VMP).
+    `por_ponto` tem as médias de cada parâmetro por (classe, Ponto,
+    Profundidade), usadas nos gráficos.
+    """
+
+    por_profundidade: pd.DataFrame
+    por_ponto: pd.DataFrame
+
+    def valor(self, parametro: str, profundidade: str, agregado: str = "media"):
+        try:
+            return self.por_profundidade.at[(parametro, profundidade), agregado]
+        except KeyError:
+            return float("nan")
+
+    def medias_por_ponto(self, classe) -> pd.DataFrame:
+        """Médias da classe, com índice (Ponto, Profundidade)."""
+        return self.por_ponto.xs(classe, level=0)
+
+
+def calcular_estatisticas(
+    df: pd.DataFrame,
+    parametros: list,
+    conformidade: pd.DataFrame,
+    coluna_classe: str = "Classe",
+) -> EstatisticasCampanha:
+    """
+    Agrega todas as medidas de `parametros` em uma única passada de groupby
+    por profundidade (mais o total) e por (classe, Ponto, Profundidade).
+    `conformidade` é a saída de `avaliar_conformidade` com a coluna
+    Profundidade mantida, de onde vêm as excedências.
+    """
+    parametros = list(dict.fromkeys(parametros))
+    medidas = df[["Profundidade"] + parametros]
+
+    # 1) Por profundidade e total, todos os parâmetros de uma vez
+    por_profundidade = (
+        medidas.groupby("Profundidade", observed=True)[parametros]
+        .agg(list(AGREGADOS))
+        .stack(level=0, future_stack=True)
+        .swaplevel()
+    )
+    total = medidas[parametros].agg(list(AGREGADOS)).T
+    total.index = pd.MultiIndex.from_product([total.index, [TOTAL]])
+    por_profundidade = pd.concat([por_profundidade, total]).rename(columns=AGREGADOS)
+    por_profundidade.index.names = ["Parametro", "Profundidade"]
+    por_profundidade["n"] = por_profundidade["n"].astype(int)
+
+    # 2) Excedências (Conforme == False) nos mesmos grupos
+    fora = conformidade.loc[
+        conformidade["Parametro"].isin(parametros), ["Parametro", "Profundidade"]
+    ].assign(excedencias=conformidade["Conforme"].eq(False))
+    por_grupo = fora.groupby(["Parametro", "Profundidade"])["excedencias"].sum()
+    por_total = fora.groupby("Parametro")["excedencias"].sum()
+    por_total.index = pd.MultiIndex.from_product([por_total.index, [TOTAL]])
+    por_profundidade["excedencias"] = pd.concat([por_grupo, por_total]).reindex(
+        por_profundidade.index, fill_value=0
+    )
+
+    # 3) Médias por ponto, para os gráficos
+    por_ponto = medidas.join(df[[coluna_classe, "Ponto"]]).groupby(
+        [coluna_classe, "Ponto", "Profundidade"], observed=True
+    )[parametros].mean()
+
+    return EstatisticasCampanha(por_profundidade, por_ponto)
@@ -0,0 +1,136 @@
+# app/services/etapas.py
+import contextvars
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from app.config import settings
+from app.utils.metricas import histograma, span
+from app.utils.perfil import perfil_ativo
+
+IO = "io"  # espera rede ou disco (Supabase, fotos, Storage)
+CPU = "cpu"  # pandas, python-docx; o desenho dos gráficos vai ao pool de processos
+
+# pools compartilhados por todos os relatórios; as etapas não esperam umas
+# pelas outras dentro do pool (quem espera é o agendador, na thread chamadora)
+_executores = {
+    IO: ThreadPoolExecutor(
+        max_workers=settings.ETAPAS_IO_WORKERS, thread_name_prefix="etapa-io"
+    ),
+    CPU: ThreadPoolExecutor(
+        max_workers=settings.ETAPAS_CPU_WORKERS, thread_name_prefix="etapa-cpu"
+    ),
+}
+
+
+@dataclass(frozen=True)
+class Etapa:
+    """
+    Nó do grafo de um relatório: `funcao` recebe como argumentos nomeados
+    os valores das etapas listadas em `entradas` e devolve o valor da etapa
+    `nome`. `tipo` escolhe o pool (IO ou CPU).
+    """
+
+    nome: str
+    funcao: Callable
+    entradas: tuple = ()
+    tipo: str = CPU
+
+
+@dataclass(frozen=True)
+class TempoEtapa:
+    """Início (desde o começo da execução) e duração da etapa, em segundos."""
+
+    inicio: float
+    duracao: float
+    tipo: str
+
+
+_DURACAO_ETAPA = histograma(
+    "relatorio_etapa_duracao_segundos", "Duração de cada etapa de um relatório."
+)
+
+
+def _medir(etapa: Etapa, argumentos: dict, rotulos: dict):
+    comeco = time.perf_counter()
+    with span(_DURACAO_ETAPA, etapa=etapa.nome, **rotulos):
+        valor = etapa.funcao(**argumentos)
+    return valor, comeco, time.perf_counter() - comeco
+
+
+def _em_linha(funcao, *args) -> Future:
+    # execução perfilada: roda na thread chamadora, que é a que o cProfile vê
+    futuro = Future()
+    try:
+        futuro.set_result(funcao(*args))
+    except BaseException as exc:
+        futuro.set_exception(exc)
+    return futuro
+
+
+def _disparar(etapa: Etapa, argumentos: dict, rotulos: dict) -> Future:
+    # cada etapa leva uma cópia do contexto (rastro de spans, perfil ativo)
+    contexto = contextvars.copy_context()
+    if perfil_ativo():
+        return _em_linha(contexto.run, _medir, etapa, argumentos, rotulos)
+    return _executores[etapa.tipo].submit(contexto.run, _medir, etapa, argumentos, rotulos)
+
+
+def executar_etapas(
+    etapas: list,
+    valores: Optional[dict] = None,
+    tempos: Optional[dict] = None,
+    rotulos: Optional[dict] = None,
+) -> dict:
+    """
+    Executa as etapas assim que todas as suas entradas estiverem prontas,
+    em paralelo nos pools de IO e de CPU. `valores` traz entradas já
+    conhecidas (não executadas). Devolve {nome: valor} de todas as etapas
+    e, se `tempos` for informado, preenche {nome: TempoEtapa}. A duração de
+    cada etapa vai ao histograma `relatorio_etapa_duracao_segundos`, com os
+    `rotulos` informados; sob `perfilar`, as etapas rodam em sequência na
+    thread chamadora.
+
+    A primeira exceção de uma etapa é relançada; as que ainda não começaram
+    são canceladas. Levanta ValueError para entradas inexistentes ou ciclos.
+    """
+    valores = dict(valores or {})
+    rotulos = rotulos or {}
+    pendentes = {etapa.nome: etapa for etapa in etapas}
+    conhecidas = set(valores) | set(pendentes)
+    for etapa in etapas:
+        faltando = set(etapa.entradas) - conhecidas
+        if faltando:
+            raise ValueError(f"Etapa '{etapa.nome}' depende de {sorted(faltando)}")
+
+    inicio = time.perf_counter()
+    em_execucao = {}
+    try:
+        while pendentes or em_execucao:
+            # 1) Dispara todas as etapas com as entradas prontas
+            prontas = [
+                etapa
+                for etapa in pendentes.values()
+                if all(nome in valores for nome in etapa.entradas)
+            ]
+            for etapa in prontas:
+                del pendentes[etapa.nome]
+                argumentos = {nome: valores[nome] for nome in etapa.entradas}
+                futuro = _disparar(etapa, argumentos, rotulos)
+                em_execucao[futuro] = etapa
+            if not em_execucao:
+                raise ValueError(f"Ciclo entre as etapas {sorted(pendentes)}")
+
+            # 2) Recolhe as que terminaram, liberando as dependentes
+            feitos, _ = wait(em_execucao, return_when=FIRST_COMPLETED)
+            for futuro in feitos:
+                etapa = em_execucao.pop(futuro)
+                valor, comeco, duracao = futuro.result()
+                valores[etapa.nome] = valor
+                if tempos is not None:
+                    tempos[etapa.nome] = TempoEtapa(comeco - inicio, duracao, etapa.tipo)
+    finally:
+        for futuro in em_execucao:
+            futuro.cancel()
+    return valores
@@ -0,0 +1,450 @@
+# app/services/historico.py
+import io
+import os
+import shutil
+import uuid
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from docx import Document
+from docx.shared import Cm
+from fastapi import HTTPException
+from pytz import timezone
+from supabase import Client
+
+from app.config import settings
+from app.schemas.historico import (
+    EstatisticaParametro,
+    HistoricoRequest,
+    HistoricoResponse,
+)
+from app.services import qag_service, qags_service, qsd_service
+from app.services.conformidade import avaliar_conformidade
+from app.services.dados import carregar_ativo
+from app.services.vmps.limites import (
+    MAXIMO,
+    LimitesCompilados,
+    limites_qag,
+    limites_qsd,
+)
+from app.utils.file_utils import upload_docx
+from app.utils.graficos import chave_serie_historica, desenhar_serie_historica
+from app.utils.graficos_pool import renderizar_graficos
+from app.utils.tabelas import tabela_por_ponto
+
+# tipo -> (formulário, VMPs compilados, coluna com a classe da amostra),
+# os mesmos usados pelo relatório de uma campanha
+TIPOS = {
+    "qag": (qag_service.FORMULARIO, limites_qag, "Classe"),
+    "qsd": (qsd_service.FORMULARIO, limites_qsd, "Classe"),
+    "qags": (qags_service.FORMULARIO, limites_qag, "Usos Preponderantes da Água"),
+}
+
+# Resultados achatados: uma linha por (campanha, amostra, parâmetro) numérico.
+# `amostra` é a posição da linha em `resultados`, para remontar as amostras.
+SCHEMA = pa.schema(
+    [
+        ("campanha", pa.date32()),
+        ("amostra", pa.int32()),
+        ("Ponto", pa.string()),
+        ("Classe", pa.string()),
+        ("Parametro", pa.string()),
+        ("Valor", pa.float64()),
+    ]
+)
+
+
+def _diretorio(tipo: str, ativo_id: str) -> str:
+    return os.path.join(settings.HISTORICO_DIR, tipo, ativo_id)
+
+
+def _campanhas_gravadas(diretorio: str) -> set:
+    if not os.path.isdir(diretorio):
+        return set()
+    return {
+        nome[: -len(".parquet")]
+        for nome in os.listdir(diretorio)
+        if nome.endswith(".parquet") and not nome.startswith(".")
+    }
+
+
+def achatar_resultados(
+    campanha: str, resultados: list, coluna_classe: str
+) -> pd.DataFrame:
+    """
+    Converte o JSON `resultados` de uma campanha para o formato longo do
+    SCHEMA. Colunas sem valor numérico (tipo de análise, profundidade,
+    "Indisponível") não entram.
+    """
+    df = pd.DataFrame(resultados or [])
+    if "Ponto" not in df:
+        return SCHEMA.empty_table().to_pandas()
+    classe = df[coluna_classe] if coluna_classe in df else None
+    df = df.drop(columns=[coluna_classe], errors="ignore")
+    df["amostra"] = np.arange(len(df), dtype=np.int32)
+    df["Classe"] = classe
+
+    longo = df.melt(
+        id_vars=["amostra", "Ponto", "Classe"],
+        var_name="Parametro",
+        value_name="Valor",
+    )
+    longo["Valor"] = pd.to_numeric(longo["Valor"], errors="coerce")
+    longo = longo.dropna(subset=["Valor"])
+    longo["Ponto"] = longo["Ponto"].astype(str)
+    longo["Classe"] = longo["Classe"].where(
+        longo["Classe"].isna(), longo["Classe"].astype(str)
+    )
+    longo.insert(0, "campanha", date.fromisoformat(campanha))
+    return longo[SCHEMA.names]
+
+
+def _gravar_campanha(diretorio: str, campanha: str, df: pd.DataFrame) -> None:
+    # escreve em um arquivo oculto e renomeia: leitores nunca veem arquivo parcial
+    os.makedirs(diretorio, exist_ok=True)
+    temporario = os.path.join(diretorio, f".{campanha}.{uuid.uuid4().hex}.tmp")
+    tabela = pa.Table.from_pandas(df, schema=SCHEMA, preserve_index=False)
+    pq.write_table(tabela, temporario)
+    os.replace(temporario, os.path.join(diretorio, f"{campanha}.parquet"))
+
+
+def carregar_historico(supabase: Client, tipo: str, ativo_id) -> pd.DataFrame:
+    """
+    Devolve todos os resultados do ativo em formato longo (SCHEMA).
+
+    Cada campanha fica em HISTORICO_DIR/<tipo>/<ativo_id>/<data>.parquet.
+    Na primeira vez todas as campanhas vêm em uma única consulta; depois só
+    as datas são consultadas e apenas as campanhas novas são baixadas e
+    gravadas. Uma campanha já gravada não é consultada de novo: se os
+    resultados dela forem corrigidos no banco, descarte o histórico do
+    ativo com `invalidar_historico` (DELETE /cache/historico/...).
+
+    Se duas linhas têm a mesma data, vale a primeira, como no relatório de
+    uma campanha (`.data[0]`).
+    """
+    formulario, _, coluna_classe = TIPOS[tipo]
+    ativo_id = str(ativo_id)
+    diretorio = _diretorio(tipo, ativo_id)
+    gravadas = _campanhas_gravadas(diretorio)
+
+    # 1) Campanhas que ainda não estão no histórico local
+    consulta = supabase.table(formulario)
+    if not gravadas:
+        linhas = (
+            consulta.select("campanha_de_coleta", "resultados")
+            .eq("ativo_id", ativo_id)
+            .execute()
+            .data
+        )
+    else:
+        datas = (
+            consulta.select("campanha_de_coleta")
+            .eq("ativo_id", ativo_id)
+            .execute()
+            .data
+        )
+        novas = sorted({str(l["campanha_de_coleta"]) for l in datas} - gravadas)
+        linhas = []
+        if novas:
+            linhas = (
+                supabase.table(formulario)
+                .select("campanha_de_coleta", "resultados")
+                .eq("ativo_id", ativo_id)
+                .in_("campanha_de_coleta", novas)
+                .execute()
+                .data
+            )
+
+    # 2) Grava cada campanha nova (primeira linha de cada data; as
+    #    seguintes com a mesma data são ignoradas)
+    for linha in linhas or []:
+        campanha = str(linha["campanha_de_coleta"])
+        if campanha in gravadas:
+            continue
+        df = achatar_resultados(campanha, linha.get("resultados"), coluna_classe)
+        _gravar_campanha(diretorio, campanha, df)
+        gravadas.add(campanha)
+
+    # 3) Lê o histórico inteiro
+    if not gravadas:
+        return SCHEMA.empty_table().to_pandas()
+    return ds.dataset(diretorio, format="parquet", schema=SCHEMA).to_table().to_pandas()
+
+
+def invalidar_historico(tipo: str, ativo_id) -> int:
+    """
+    Apaga o histórico local do ativo e devolve quantas campanhas havia; a
+    próxima consulta baixa todas de novo.
+    """
+    diretorio = _diretorio(tipo, str(ativo_id))
+    removidas = len(_campanhas_gravadas(diretorio))
+    # renomeia antes de apagar: quem lista o diretório não vê remoção parcial
+    descartado = f"{diretorio}.{uuid.uuid4().hex}.removido"
+    try:
+        os.replace(diretorio, descartado)
+    except FileNotFoundError:
+        return 0
+    shutil.rmtree(descartado, ignore_errors=True)
+    return removidas
+
+
+def parametros_padrao(historico: pd.DataFrame, limites: LimitesCompilados) -> list:
+    """
+    Parâmetros do histórico que têm VMP, na ordem dos VMPs; se nenhum tiver,
+    todos os parâmetros numéricos do histórico.
+    """
+    presentes = list(dict.fromkeys(historico["Parametro"]))
+    com_vmp = [p for p in limites.parametros if p in set(presentes)]
+    return com_vmp or presentes
+
+
+def _conformidade_por_campanha(historico: pd.DataFrame, limites) -> pd.DataFrame:
+    # remonta as amostras (uma linha por amostra, um parâmetro por coluna)
+    amostras = historico.fillna({"Classe": ""}).pivot_table(
+        index=["campanha", "amostra", "Ponto", "Classe"],
+        columns="Parametro",
+        values="Valor",
+        aggfunc="first",
+    )
+    amostras.columns.name = None
+    amostras = amostras.reset_index()
+    partes = []
+    for campanha, grupo in amostras.groupby("campanha", sort=True):
+        conformidade = avaliar_conformidade(grupo, limites)
+        conformidade["campanha"] = campanha
+        partes.append(conformidade)
+    return pd.concat(partes, ignore_index=True)
+
+
+def estatisticas_historico(
+    historico: pd.DataFrame, limites: LimitesCompilados, parametros: list
+) -> pd.DataFrame:
+    """
+    Estatísticas por (Ponto, Parametro) ao longo das campanhas: número de
+    campanhas, resultados avaliados e excedências do VMP (com a banda de pH
+    da amostra, como no relatório de uma campanha), mínimo, máximo e média
+    dos resultados, inclinação por ano da reta ajustada às médias de cada
+    campanha e o último valor.
+    """
+    conformidade = _conformidade_por_campanha(historico, limites)
+    historico = historico[historico["Parametro"].isin(parametros)]
+    conformidade = conformidade[conformidade["Parametro"].isin(parametros)]
+    chaves = ["Ponto", "Parametro"]
+
+    # 1) Média de cada campanha e reta de tendência (mínimos quadrados)
+    serie = historico.groupby(chaves + ["campanha"], sort=True)["Valor"].mean()
+    serie = serie.reset_index()
+    inicio = pd.Timestamp(serie["campanha"].min())
+    t = (pd.to_datetime(serie["campanha"]) - inicio).dt.days.to_numpy() / 365.25
+    serie["t"], serie["tv"], serie["tt"] = t, t * serie["Valor"], t * t
+    por_serie = serie.groupby(chaves, sort=False).agg(
+        campanhas=("campanha", "size"),
+        ultima_campanha=("campanha", "last"),
+        ultimo_valor=("Valor", "last"),
+        media_campanhas=("Valor", "mean"),
+        mt=("t", "mean"),
+        mtv=("tv", "mean"),
+        mtt=("tt", "mean"),
+    )
+    variancia = por_serie["mtt"] - por_serie["mt"] ** 2
+    covariancia = por_serie["mtv"] - por_serie["mt"] * por_serie["media_campanhas"]
+    por_serie["tendencia_ano"] = (covariancia / variancia).where(variancia > 1e-12)
+
+    # 2) Resultados individuais
+    valores = historico.groupby(chaves, sort=False)["Valor"].agg(
+        minimo="min", maximo="max", media="mean"
+    )
+
+    # 3) Excedências
+    conformidade["avaliados"] = conformidade["Conforme"].notna()
+    conformidade["excedencias"] = conformidade["Conforme"].eq(False)
+    excedencias = conformidade.groupby(chaves, sort=False)[
+        ["avaliados", "excedencias"]
+    ].sum()
+
+    estatisticas = por_serie.join(valores).join(excedencias).fillna(
+        {"avaliados": 0, "excedencias": 0}
+    )
+    estatisticas["percentual_excedencia"] = (
+        estatisticas["excedencias"] / estatisticas["avaliados"] * 100
+    ).where(estatisticas["avaliados"] > 0)
+    estatisticas = estatisticas.reset_index()
+
+    # ordem: pontos como aparecem, parâmetros na ordem pedida
+    ordem = {p: i for i, p in enumerate(parametros)}
+    estatisticas["_ordem"] = estatisticas["Parametro"].map(ordem)
+    estatisticas = estatisticas.sort_values(["Ponto", "_ordem"], kind="stable")
+    return estatisticas[
+        [
+            "Ponto",
+            "Parametro",
+            "campanhas",
+            "avaliados",
+            "excedencias",
+            "percentual_excedencia",
+            "minimo",
+            "maximo",
+            "media",
+            "tendencia_ano",
+            "ultima_campanha",
+            "ultimo_valor",
+        ]
+    ].reset_index(drop=True)
+
+
+def _limite_unico(historico, limites, parametro):
+    # uma linha de VMP só faz sentido se todos os pontos têm o mesmo máximo
+    p = limites.idx_parametro.get(parametro)
+    classes = historico.loc[historico["Parametro"] == parametro, "Classe"].unique()
+    c = [limites.idx_classe[x] for x in classes if x in limites.idx_classe]
+    if p is None or not c:
+        return None
+    if not (limites.tipo[c, p] == MAXIMO).all():
+        return None
+    maximos = np.unique(limites.maximo[c, p, 0])
+    return float(maximos[0]) if len(maximos) == 1 else None
+
+
+def specs_series_historicas(
+    historico: pd.DataFrame, limites: LimitesCompilados, parametros: list
+) -> list:
+    """Um spec de `desenhar_serie_historica` por parâmetro."""
+    datas = sorted(historico["campanha"].unique())
+    medias = (
+        historico[historico["Parametro"].isin(parametros)]
+        .groupby(["Parametro", "campanha", "Ponto"], sort=False)["Valor"]
+        .mean()
+    )
+    specs = []
+    for parametro in parametros:
+        if parametro not in medias.index.get_level_values(0):
+            continue
+        tabela = medias.loc[parametro].unstack("Ponto").reindex(datas)
+        specs.append(
+            {
+                "datas": [d.isoformat() for d in datas],
+                "series": {
+                    str(ponto): tabela[ponto].to_numpy(float) for ponto in tabela
+                },
+                "limite": _limite_unico(historico, limites, parametro),
+                "titulo": f"{parametro} - série histórica",
+            }
+        )
+    return specs
+
+
+def _texto(valor) -> str:
+    if valor is None or (isinstance(valor, float) and np.isnan(valor)):
+        return "-"
+    if isinstance(valor, float):
+        return f"{valor:.4g}".replace(".", ",")
+    return str(valor)
+
+
+def gerar_relatorio_historico(
+    supabase: Client, payload: HistoricoRequest
+) -> HistoricoResponse:
+    """
+    Gera, faz upload e registra no banco um relatório de tendência com
+    todas as campanhas do ativo.
+    """
+    # 1) Datas e chaves
+    _, limites, _ = TIPOS[payload.tipo]
+    bucket = f"relatorios-{payload.tipo}"
+    tz_br = timezone("America/Sao_Paulo")
+    now_br = datetime.now(tz_br)
+    object_key = f"{payload.ativo_id}/historico/{now_br:%Y-%m-%d_%H-%M-%S}.docx"
+
+    # 2) Ativo e histórico
+    ativo = carregar_ativo(supabase, payload.ativo_id)
+    if not ativo:
+        raise HTTPException(404, detail="Ativo não encontrado")
+    historico = carregar_historico(supabase, payload.tipo, payload.ativo_id)
+    if historico.empty:
+        raise HTTPException(404, detail="Nenhuma campanha encontrada")
+
+    # 3) Estatísticas e gráficos
+    parametros = payload.parametros or parametros_padrao(historico, limites)
+    estatisticas = estatisticas_historico(historico, limites, parametros)
+    specs = specs_series_historicas(historico, limites, parametros)
+    imagens = renderizar_graficos(
+        specs, desenhar=desenhar_serie_historica, chave=chave_serie_historica
+    )
+    campanhas = sorted(historico["campanha"].unique())
+
+    # 4) Documento
+    document = Document()
+    document.add_heading(payload.nome_relatorio, 0)
+    document.add_paragraph(
+        f"{ativo['nome']} - {len(campanhas)} campanhas, de "
+        f"{campanhas[0]:%d/%m/%Y} a {campanhas[-1]:%d/%m/%Y}."
+    )
+    if payload.descricao_relatorio:
+        document.add_paragraph(payload.descricao_relatorio)
+
+    document.add_heading("Excedências e tendência por ponto", 1)
+    tabela = pd.DataFrame(
+        {
+            "Ponto": estatisticas["Ponto"],
+            "Parâmetro": estatisticas["Parametro"],
+            "Campanhas": estatisticas["campanhas"],
+            "Excedências": [
+                f"{int(e)}/{int(a)}"
+                for e, a in zip(estatisticas["excedencias"], estatisticas["avaliados"])
+            ],
+            "Média": estatisticas["media"].map(_texto),
+            "Tendência (/ano)": estatisticas["tendencia_ano"].map(_texto),
+            "Último valor": estatisticas["ultimo_valor"].map(_texto),
+        }
+    )
+    tabela_por_ponto(document, tabela, list(tabela.columns[1:]))
+
+    document.add_heading("Séries históricas", 1)
+    for imagem in imagens:
+        document.add_picture(io.BytesIO(imagem), width=Cm(16))
+
+    # 5) Upload no Storage
+    upload_docx(supabase, bucket, object_key, document)
+    public_url = supabase.storage.from_(bucket).get_public_url(object_key)
+
+    resposta = dict(
+        url_relatorio=public_url,
+        campanhas=campanhas,
+        estatisticas=[
+            EstatisticaParametro(
+                **{
+                    k: (None if isinstance(v, float) and np.isnan(v) else v)
+                    for k, v in linha.items()
+                }
+            )
+            for linha in estatisticas.rename(
+                columns={"Ponto": "ponto", "Parametro": "parametro"}
+            ).to_dict("records")
+        ],
+    )
+
+    # 6) Insere registro na tabela `relatorios`
+    try:
+        supabase.table("relatorios").insert(
+            {
+                "nome_relatorio": payload.nome_relatorio,
+                "descricao_relatorio": payload.descricao_relatorio,
+                "ativo_id": str(payload.ativo_id),
+                "user_id": str(payload.user_id),
+                "tipo_relatorio": f"{payload.tipo}_historico",
+                "url_relatorio": public_url,
+            }
+        ).execute()
+    except Exception as e:
+        return HistoricoResponse(
+            sucesso=False,
+            mensagem=f"Erro ao registrar o relatório: {str(e)}",
+            **resposta,
+        )
+    return HistoricoResponse(
+        sucesso=True, mensagem="Relatório gerado e registrado com sucesso.", **resposta
+    )
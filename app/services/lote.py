@@ -0,0 +1,92 @@
+# app/services/lote.py
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterator, List
+
+from fastapi import HTTPException
+from supabase import Client
+
+from app.config import settings
+from app.jobs.fila import GERADORES
+from app.schemas.batch import LoteRequest, ResultadoLote
+from app.services import qag_service, qags_service, qsd_service
+from app.services.dados import carregar_dados_lote
+
+# tipo do relatório -> módulo com FORMULARIO e COLUNAS_FORMULARIO
+SERVICOS = {
+    "qag": qag_service,
+    "qsd": qsd_service,
+    "qags": qags_service,
+}
+
+# pool compartilhado por todos os lotes; templates e VMPs já são globais
+# (registro de templates e limites compilados na importação)
+_executor = ThreadPoolExecutor(
+    max_workers=settings.LOTE_WORKERS, thread_name_prefix="lote"
+)
+
+
+def preparar_lote(supabase: Client, lote: LoteRequest) -> List[tuple]:
+    """
+    Monta o payload de cada item e busca de uma vez as linhas de todos eles.
+    Devolve uma lista de (indice, item, payload, dados), onde `dados` é um
+    DadosRelatorio ou a HTTPException 404 do item.
+    """
+    # 1) Payloads no schema de cada tipo
+    payloads = []
+    for item in lote.itens:
+        _, schema = GERADORES[item.tipo]
+        campos = item.model_dump(exclude={"tipo"}, exclude_none=True)
+        payloads.append(schema(user_id=lote.user_id, **campos))
+
+    # 2) Consultas em lote
+    pedidos = [
+        (
+            SERVICOS[item.tipo].FORMULARIO,
+            SERVICOS[item.tipo].COLUNAS_FORMULARIO,
+            item.ativo_id,
+            item.data_campanha.isoformat(),
+        )
+        for item in lote.itens
+    ]
+    dados = carregar_dados_lote(supabase, pedidos)
+
+    return [
+        (indice, item, payload, dados[(formulario, str(ativo_id), data)])
+        for indice, (item, payload, (formulario, _, ativo_id, data)) in enumerate(
+            zip(lote.itens, payloads, pedidos)
+        )
+    ]
+
+
+def _gerar(supabase: Client, indice: int, item, payload, dados) -> ResultadoLote:
+    resultado = dict(
+        indice=indice,
+        tipo=item.tipo,
+        ativo_id=item.ativo_id,
+        data_campanha=item.data_campanha,
+    )
+    try:
+        if isinstance(dados, HTTPException):
+            raise dados
+        gerador, _ = GERADORES[item.tipo]
+        resposta = gerador(supabase, payload, dados)
+        return ResultadoLote(**resultado, **resposta.model_dump())
+    except HTTPException as e:
+        return ResultadoLote(**resultado, sucesso=False, mensagem=str(e.detail))
+    except Exception as e:
+        return ResultadoLote(**resultado, sucesso=False, mensagem=str(e))
+
+
+def executar_lote(supabase: Client, preparados: List[tuple]) -> Iterator[ResultadoLote]:
+    """
+    Gera os relatórios do lote no pool e devolve cada resultado assim que o
+    item termina (fora da ordem da requisição; use `indice`). Se o consumidor
+    parar de ler, os itens que ainda não começaram são cancelados.
+    """
+    futuros = [_executor.submit(_gerar, supabase, *item) for item in preparados]
+    try:
+        for futuro in as_completed(futuros):
+            yield futuro.result()
+    finally:
+        for futuro in futuros:
+            futuro.cancel()
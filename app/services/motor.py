@@ -0,0 +1,819 @@
+# app/services/motor.py
+import asyncio
+import contextvars
+import io
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date, datetime
+from functools import partial
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from docx.enum.table import WD_TABLE_ALIGNMENT
+from docx.shared import Cm
+from docxtpl import DocxTemplate, InlineImage, RichText
+from pytz import timezone
+from supabase import AsyncClient, Client
+
+from app.config import settings
+from app.services.conformidade import avaliar_conformidade, percentual_conforme
+from app.services.dados import DadosRelatorio, carregar_dados, carregar_dados_async
+from app.services.especificacao import (
+    Campo,
+    DataCampanha,
+    DataGeracao,
+    EspecificacaoRelatorio,
+    Fixo,
+    Foto,
+    GraficoGranulometria,
+    GraficosLinhaPorClasse,
+    GraficosQualidadeAgua,
+    Laudo,
+    MediaPorAmostra,
+    NumeroPontos,
+    PercentualConforme,
+    PercentualPontos,
+    TabelaConformidade,
+    TabelaIndicadores,
+    TabelaMedias,
+    TabelaPorPonto,
+    ValoresUnicos,
+)
+from app.services.etapas import IO, Etapa, executar_etapas
+from app.services.estatisticas import (
+    TOTAL,
+    EstatisticasCampanha,
+    calcular_estatisticas,
+)
+from app.services.reuso_relatorios import (
+    Publicacao,
+    chave_relatorio,
+    get_reuso_relatorios,
+    registro_pedido,
+)
+from app.services.resultados import EsquemaResultados, ResultadosCampanha, ler_resultados
+from app.utils.date_utils import mes_por_extenso
+from app.utils.file_utils import (
+    enviar_docx,
+    enviar_docx_async,
+    salvar_docx,
+    upload_docx,
+)
+from app.utils.fotos import baixar_fotos
+from app.utils.graficos import (
+    gera_distribuicao_granulometrica_qsd,
+    graficos_linha_com_vmp_por_classe_qsd,
+    specs_qualidade_agua,
+)
+from app.utils.graficos_pool import renderizar_graficos
+from app.utils.metricas import contador, histograma, span
+from app.utils.tabelas import tabela_por_ponto
+from app.utils.templates import obter_template
+
+# tipo -> especificação, preenchido pelos serviços na importação
+ESPECIFICACOES = {}
+
+# seções que leem os agregados da campanha (EstatisticasCampanha)
+_COM_ESTATISTICAS = (TabelaMedias, GraficosQualidadeAgua)
+
+
+def registrar(especificacao: EspecificacaoRelatorio) -> EspecificacaoRelatorio:
+    """Torna a especificação conhecida pelo nome do tipo (pré-carga de templates)."""
+    ESPECIFICACOES[especificacao.tipo] = especificacao
+    return especificacao
+
+
+@dataclass(frozen=True)
+class Relatorio:
+    """
+    Estado de um relatório em montagem, lido pelas seções: o template, as
+    linhas do Supabase, os resultados tipados, a conformidade de todas as
+    amostras e os agregados (calculados uma vez, None se nenhuma seção os
+    usa) e as fotos já baixadas, por chave.
+    """
+
+    especificacao: EspecificacaoRelatorio
+    document: DocxTemplate
+    payload: object
+    dados: DadosRelatorio
+    resultados: ResultadosCampanha
+    conformidade: pd.DataFrame
+    estatisticas: Optional[EstatisticasCampanha]
+    fotos: dict
+
+    @property
+    def df(self) -> pd.DataFrame:
+        return self.resultados.df
+
+    @property
+    def data(self) -> date:
+        return self.payload.data_campanha
+
+
+# --- Valores simples ---
+
+
+def _fixo(secao: Fixo, relatorio: Relatorio):
+    return secao.valor
+
+
+def _campo(secao: Campo, relatorio: Relatorio):
+    if secao.fonte == "payload":
+        return getattr(relatorio.payload, secao.coluna)
+    if secao.fonte == "laboratorio":
+        laboratorio = relatorio.dados.configuracao["dados_laboratoriais"][0]
+        return laboratorio.get(secao.coluna)
+    return getattr(relatorio.dados, secao.fonte)[secao.coluna]
+
+
+def _data_campanha(secao: DataCampanha, relatorio: Relatorio):
+    if secao.formato == "extenso":
+        return mes_por_extenso(relatorio.data.strftime("%m"))
+    return relatorio.data.strftime(secao.formato)
+
+
+def _data_geracao(secao: DataGeracao, relatorio: Relatorio):
+    return getattr(datetime.now(), secao.atributo)
+
+
+def _numero_pontos(secao: NumeroPontos, relatorio: Relatorio):
+    return relatorio.df["Ponto"].nunique()
+
+
+def _valores_unicos(secao: ValoresUnicos, relatorio: Relatorio):
+    return np.asarray(relatorio.df[secao.coluna].unique())
+
+
+def _media_por_amostra(secao: MediaPorAmostra, relatorio: Relatorio):
+    return sum(relatorio.df[secao.coluna]) / len(relatorio.df)
+
+
+# --- Anexos ---
+
+
+def _foto(secao: Foto, relatorio: Relatorio):
+    return InlineImage(
+        relatorio.document,
+        io.BytesIO(relatorio.fotos[secao.chave]),
+        width=Cm(secao.largura_cm),
+    )
+
+
+def _laudo(secao: Laudo, relatorio: Relatorio):
+    laudo = relatorio.dados.campanha[secao.coluna][0]
+    texto = RichText()
+    texto.add(
+        laudo,
+        underline=True,
+        color=secao.cor,
+        url_id=relatorio.document.build_url_id(laudo),
+    )
+    return texto
+
+
+# --- Tabelas e conformidade ---
+
+
+def _tabela_por_ponto(secao: TabelaPorPonto, relatorio: Relatorio):
+    subdoc = relatorio.document.new_subdoc()
+    colunas = list(secao.colunas)
+    tabela_por_ponto(subdoc, relatorio.resultados.textos(["Ponto"] + colunas), colunas)
+    return subdoc
+
+
+def _tabela_medias(secao: TabelaMedias, relatorio: Relatorio):
+    """
+    Tabela "Parâmetro x Média" (total, superfície, meio e fundo), lida dos
+    agregados da campanha.
+    """
+    subdoc = relatorio.document.new_subdoc()
+    estatisticas = relatorio.estatisticas
+
+    # número de linhas: 2 de cabeçalho + 1 para cada parâmetro
+    n_rows = 2 + len(secao.parametros)
+    n_cols = 1 + 4  # 1 coluna Parâmetro + 4 colunas de Média
+
+    table = subdoc.add_table(rows=n_rows, cols=n_cols)
+    table.style = "Table Grid"
+    table.alignment = WD_TABLE_ALIGNMENT.CENTER
+
+    # --- 1) Cabeçalho em dois níveis ---
+
+    # linha 0: "Parâmetro" (rowspan=2) + "Média" (colspan=4)
+    hdr0 = table.rows[0].cells
+    hdr0[0].text = "Parâmetro"
+    # mescla horizontal colunas 1..4
+    m = hdr0[1].merge(hdr0[2]).merge(hdr0[3]).merge(hdr0[4])
+    m.text = "Média"
+
+    # aplica bold ao hdr0
+    for cell in [hdr0[0], m]:
+        for p in cell.paragraphs:
+            for r in p.runs:
+                r.font.bold = True
+
+    # linha 1: labels das 4 subcolunas
+    hdr1 = table.rows[1].cells
+    hdr1[0].text = ""  # espaço porque Parâmetro já virou rowspan
+    for idx, label in enumerate(["Total", "Superfície", "Meio", "Fundo"], start=1):
+        hdr1[idx].text = label
+        for p in hdr1[idx].paragraphs:
+            for r in p.runs:
+                r.font.bold = True
+
+    # --- 2) Corpo da tabela: uma linha por parâmetro ---
+
+    for i, param in enumerate(secao.parametros):
+        row = table.rows[2 + i].cells
+        row[0].text = param
+        for col, profundidade in enumerate(
+            (TOTAL, "Superfície", "Meio", "Fundo"), start=1
+        ):
+            val = estatisticas.valor(param, profundidade)
+            row[col].text = "" if pd.isna(val) else f"{val:.2f}"
+
+    return subdoc
+
+
+def _percentual_conforme(secao: PercentualConforme, relatorio: Relatorio):
+    return percentual_conforme(relatorio.conformidade, secao.parametros)
+
+
+def _tabela_conformidade(secao: TabelaConformidade, relatorio: Relatorio):
+    conformidade = relatorio.conformidade
+
+    # 1) Resultados dos parâmetros da seção, marcando os fora do VMP
+    tabela = conformidade.loc[
+        conformidade["Parametro"].isin(list(secao.colunas)),
+        ["Ponto", "Parametro", "Valor", "Conforme"],
+    ]
+    valores = []
+    for valor, fora in zip(tabela["Valor"], tabela["Conforme"].eq(False)):
+        if secao.destaque == "vermelho":
+            texto = str(valor)
+            if fora:
+                texto = RichText()
+                texto.add(str(valor), color="FF0000")  # run vermelho
+            valores.append(texto)
+        elif fora:
+            sufixo = " Inconforme!" if secao.destaque == "sufixo" else ""
+            valores.append(f"{valor}{sufixo}")
+        else:
+            valores.append(valor)
+
+    # 2) Pivot: um registro por ponto, com os nomes de coluna do template
+    tabela = (
+        tabela.assign(Valor=valores)
+        .pivot(index="Ponto", columns="Parametro", values="Valor")
+        .reset_index()
+    )
+    for coluna in secao.categorias:
+        tabela[coluna] = tabela["Ponto"].map(relatorio.df.set_index("Ponto")[coluna])
+    return tabela.rename(columns=secao.colunas).to_dict(orient="records")
+
+
+def _tabela_indicadores(secao: TabelaIndicadores, relatorio: Relatorio):
+    indicadores = pd.DataFrame(secao.indicadores)
+    if "Parametro" not in indicadores:
+        # sem parâmetro associado nenhum indicador pode ser avaliado
+        return []
+    conformidade = relatorio.conformidade
+    if secao.parametros:
+        conformidade = conformidade[conformidade["Parametro"].isin(secao.parametros)]
+    tabela = (
+        indicadores.merge(
+            conformidade[["Parametro", "Valor", "Conforme"]],
+            how="left",
+            on="Parametro",
+        )
+        .dropna()
+    )
+    tabela["Conforme"] = tabela["Conforme"].map(
+        {True: "Alcançado", False: "Não Alcançado"}
+    )
+    tabela = tabela.drop(columns=["Tipo", "Programa", "Valor", "Unidade", "Parametro"])
+    return tabela.rename(columns={"Conforme": "Resultado"}).to_dict(orient="records")
+
+
+def _percentual_pontos(secao: PercentualPontos, relatorio: Relatorio):
+    conformidade = relatorio.conformidade
+    pontos = pd.Series(
+        conformidade.loc[
+            conformidade["Parametro"].isin(secao.parametros), "Ponto"
+        ].unique()
+    )
+    valores = pontos.map(relatorio.df.set_index("Ponto")[secao.coluna])
+    return (valores == secao.valor).mean() * 100
+
+
+# --- Gráficos ---
+
+
+def _specs_qualidade_agua(
+    secao: GraficosQualidadeAgua,
+    df: pd.DataFrame,
+    coluna_classe: str,
+    estatisticas: EstatisticasCampanha,
+):
+    specs = []
+    for classe in df[coluna_classe].unique():
+        specs.extend(
+            specs_qualidade_agua(
+                estatisticas.medias_por_ponto(classe),
+                list(secao.parametros),
+                classe,
+                secao.vmp,
+            )
+        )
+    return specs
+
+
+def _grafico_granulometria(secao: GraficoGranulometria, relatorio: Relatorio):
+    png = gera_distribuicao_granulometrica_qsd(relatorio.df[list(secao.colunas)])
+    return InlineImage(relatorio.document, io.BytesIO(png), width=Cm(secao.largura_cm))
+
+
+def _graficos_linha_por_classe(secao: GraficosLinhaPorClasse, relatorio: Relatorio):
+    return [
+        InlineImage(relatorio.document, io.BytesIO(png), width=Cm(12), height=Cm(6))
+        for png in graficos_linha_com_vmp_por_classe_qsd(
+            relatorio.df, list(secao.parametros), secao.vmp
+        )
+    ]
+
+
+# tipo de seção -> função que devolve o valor da chave no contexto
+MONTADORES = {
+    Fixo: _fixo,
+    Campo: _campo,
+    DataCampanha: _data_campanha,
+    DataGeracao: _data_geracao,
+    NumeroPontos: _numero_pontos,
+    ValoresUnicos: _valores_unicos,
+    MediaPorAmostra: _media_por_amostra,
+    Foto: _foto,
+    Laudo: _laudo,
+    TabelaPorPonto: _tabela_por_ponto,
+    TabelaMedias: _tabela_medias,
+    PercentualConforme: _percentual_conforme,
+    TabelaConformidade: _tabela_conformidade,
+    TabelaIndicadores: _tabela_indicadores,
+    PercentualPontos: _percentual_pontos,
+    GraficoGranulometria: _grafico_granulometria,
+    GraficosLinhaPorClasse: _graficos_linha_por_classe,
+}
+
+
+# --- Etapas ---
+
+
+def _carregar_dados(especificacao, supabase, payload):
+    # consultas em paralelo, só com as colunas usadas
+    return carregar_dados(
+        supabase,
+        payload.ativo_id,
+        payload.data_campanha.isoformat(),
+        especificacao.formulario,
+        especificacao.colunas_formulario,
+    )
+
+
+def _ler_resultados(especificacao, dados):
+    resultados = ler_resultados(dados.campanha["resultados"], especificacao.esquema)
+    if especificacao.medidas_inteiras:
+        _medidas_inteiras(resultados.df, especificacao.esquema)
+    return resultados
+
+
+def _medidas_inteiras(df: pd.DataFrame, esquema: EsquemaResultados) -> None:
+    # medidas sem casas decimais em nenhuma amostra ficam Int64 (sem ".0")
+    for coluna in df.columns:
+        if coluna in esquema.categorias:
+            continue
+        valores = df[coluna].dropna()
+        if not valores.empty and (valores % 1 == 0).all():
+            df[coluna] = df[coluna].astype("Int64")
+
+
+def _usa_estatisticas(especificacao) -> bool:
+    return any(isinstance(s, _COM_ESTATISTICAS) for s in especificacao.secoes)
+
+
+def _conformidade(especificacao, resultados):
+    # as seções com estatísticas precisam da profundidade de cada resultado
+    return avaliar_conformidade(
+        resultados.df,
+        especificacao.limites,
+        coluna_classe=especificacao.coluna_classe,
+        manter=("Profundidade",) if _usa_estatisticas(especificacao) else (),
+    )
+
+
+def _estatisticas(especificacao, resultados, conformidade):
+    """Agregados dos parâmetros de todas as seções que os usam, uma vez."""
+    if not _usa_estatisticas(especificacao):
+        return None
+    parametros = [
+        parametro
+        for secao in especificacao.secoes
+        if isinstance(secao, _COM_ESTATISTICAS)
+        for parametro in secao.parametros
+    ]
+    return calcular_estatisticas(
+        resultados.df, parametros, conformidade, especificacao.coluna_classe
+    )
+
+
+def _baixar_fotos(especificacao, dados):
+    fotos = [secao for secao in especificacao.secoes if isinstance(secao, Foto)]
+    urls = [dados.campanha[secao.coluna][0] for secao in fotos]
+    return dict(zip([secao.chave for secao in fotos], baixar_fotos(urls)))
+
+
+def _graficos(especificacao, resultados, estatisticas):
+    """
+    PNGs de todas as seções GraficosQualidadeAgua, desenhados em um único
+    lote no pool de processos, por chave.
+    """
+    specs = {
+        secao.chave: _specs_qualidade_agua(
+            secao, resultados.df, especificacao.coluna_classe, estatisticas
+        )
+        for secao in especificacao.secoes
+        if isinstance(secao, GraficosQualidadeAgua)
+    }
+    pngs = iter(renderizar_graficos([s for lista in specs.values() for s in lista]))
+    return {chave: [next(pngs) for _ in lista] for chave, lista in specs.items()}
+
+
+def _secoes(especificacao, payload, **entradas):
+    """Valores de todas as seções que não vão ao pool de gráficos."""
+    relatorio = Relatorio(especificacao=especificacao, payload=payload, **entradas)
+    return {
+        secao.chave: MONTADORES[type(secao)](secao, relatorio)
+        for secao in especificacao.secoes
+        if not isinstance(secao, GraficosQualidadeAgua)
+    }
+
+
+def _renderizar(document, secoes, graficos):
+    contexto = dict(secoes)
+    for chave, pngs in graficos.items():
+        contexto[chave] = [
+            InlineImage(document, io.BytesIO(png), width=Cm(12), height=Cm(6))
+            for png in pngs
+        ]
+    document.render(contexto)
+    return document
+
+
+def url_publica(especificacao, supabase, object_key) -> str:
+    """URL pública de `object_key` no bucket do relatório."""
+    return supabase.storage.from_(especificacao.bucket).get_public_url(object_key)
+
+
+def _enviar(especificacao, supabase, object_key, renderizado):
+    upload_docx(supabase, especificacao.bucket, object_key, renderizado)
+    return url_publica(especificacao, supabase, object_key)
+
+
+def _linha_relatorio(especificacao, payload, public_url) -> dict:
+    return {
+        "nome_relatorio": payload.nome_relatorio,
+        "descricao_relatorio": payload.descricao_relatorio,
+        "ativo_id": str(payload.ativo_id),
+        "user_id": str(payload.user_id),
+        "tipo_relatorio": especificacao.tipo_relatorio,
+        "url_relatorio": public_url,
+    }
+
+
+def _resposta_registro(especificacao, public_url, erro=None):
+    if erro is not None:
+        return especificacao.resposta(
+            sucesso=False,
+            mensagem=f"Erro ao registrar o relatório: {str(erro)}",
+            url_relatorio=public_url,
+        )
+    return especificacao.resposta(
+        sucesso=True,
+        mensagem="Relatório gerado e registrado com sucesso.",
+        url_relatorio=public_url,
+    )
+
+
+def _registrar(especificacao, supabase, payload, public_url):
+    # Insere registro na tabela `relatorios`
+    try:
+        supabase.table("relatorios").insert(
+            _linha_relatorio(especificacao, payload, public_url)
+        ).execute()
+    except Exception as e:
+        return _resposta_registro(especificacao, public_url, e)
+    return _resposta_registro(especificacao, public_url)
+
+
+async def _registrar_async(especificacao, supabase, payload, public_url):
+    try:
+        await supabase.table("relatorios").insert(
+            _linha_relatorio(especificacao, payload, public_url)
+        ).execute()
+    except Exception as e:
+        return _resposta_registro(especificacao, public_url, e)
+    return _resposta_registro(especificacao, public_url)
+
+
+def etapas_relatorio(
+    especificacao: EspecificacaoRelatorio, supabase: Client, payload, object_key: str
+) -> list:
+    """
+    Grafo de um relatório. Fotos, template e leitura dos resultados não
+    dependem uns dos outros; os gráficos (pool de processos) são desenhados
+    enquanto as tabelas e demais seções são montadas no documento.
+    """
+    return [
+        Etapa(
+            "dados", partial(_carregar_dados, especificacao, supabase, payload), (), IO
+        ),
+        Etapa("document", partial(obter_template, especificacao.template)),
+        Etapa("fotos", partial(_baixar_fotos, especificacao), ("dados",), IO),
+        Etapa("resultados", partial(_ler_resultados, especificacao), ("dados",)),
+        Etapa("conformidade", partial(_conformidade, especificacao), ("resultados",)),
+        Etapa(
+            "estatisticas",
+            partial(_estatisticas, especificacao),
+            ("resultados", "conformidade"),
+        ),
+        # a thread só espera o pool de processos, que é quem desenha
+        Etapa(
+            "graficos",
+            partial(_graficos, especificacao),
+            ("resultados", "estatisticas"),
+            IO,
+        ),
+        Etapa(
+            "secoes",
+            partial(_secoes, especificacao, payload),
+            (
+                "document",
+                "dados",
+                "resultados",
+                "conformidade",
+                "estatisticas",
+                "fotos",
+            ),
+        ),
+        Etapa("renderizado", _renderizar, ("document", "secoes", "graficos")),
+        Etapa(
+            "public_url",
+            partial(_enviar, especificacao, supabase, object_key),
+            ("renderizado",),
+            IO,
+        ),
+        Etapa(
+            "resposta",
+            partial(_registrar, especificacao, supabase, payload),
+            ("public_url",),
+            IO,
+        ),
+    ]
+
+
+# etapas que levam o documento ao Storage e ao banco
+_ARMAZENAMENTO = ("public_url", "resposta")
+
+# threads que esperam o grafo de etapas dos pedidos async (quem trabalha
+# são os pools de etapas); limita os relatórios em montagem ao mesmo tempo
+_executor_async = ThreadPoolExecutor(
+    max_workers=settings.RELATORIOS_ASYNC_WORKERS, thread_name_prefix="relatorio-async"
+)
+
+_DURACAO_RELATORIO = histograma(
+    "relatorio_duracao_segundos", "Duração da geração completa de um relatório."
+)
+# o mesmo histograma das etapas do grafo, para as etapas do caminho async
+_DURACAO_ETAPA = histograma(
+    "relatorio_etapa_duracao_segundos", "Duração de cada etapa de um relatório."
+)
+_ERROS_RELATORIO = contador(
+    "relatorio_erros_total", "Relatórios cuja geração terminou em exceção."
+)
+
+
+def _object_key(payload) -> str:
+    now_br = datetime.now(timezone("America/Sao_Paulo"))
+    data_str = payload.data_campanha.isoformat()
+    return f"{payload.ativo_id}/{data_str}/{now_br:%Y-%m-%d_%H-%M-%S}.docx"
+
+
+@contextmanager
+def _medir(especificacao):
+    rotulos = {"relatorio": especificacao.tipo}
+    try:
+        with span(_DURACAO_RELATORIO, **rotulos):
+            yield rotulos
+    except Exception:
+        _ERROS_RELATORIO.incrementar(**rotulos)
+        raise
+
+
+def gerar_relatorio(
+    especificacao: EspecificacaoRelatorio,
+    supabase: Client,
+    payload,
+    dados: Optional[DadosRelatorio] = None,
+    tempos: Optional[dict] = None,
+):
+    """
+    Gera, faz upload e registra no banco um relatório descrito por
+    `especificacao`, executando as etapas independentes em paralelo.
+    `dados` já vindos da busca em lote dispensam as consultas. Se `tempos`
+    for informado, recebe {etapa: TempoEtapa}. Devolve
+    `especificacao.resposta`. Duração e falhas vão às métricas do /metrics.
+
+    Pedidos com as mesmas entradas e o mesmo conteúdo da campanha esperam
+    uma única geração, e os seguintes recebem o documento já publicado (ver
+    ReusoRelatorios). Cada pedido com outro usuário, nome ou descrição é
+    registrado em `relatorios`; só a repetição exata recebe o registro já
+    feito.
+    """
+    object_key = _object_key(payload)
+    etapas = etapas_relatorio(especificacao, supabase, payload, object_key)
+    with _medir(especificacao) as rotulos:
+        # 1) Dados primeiro: o conteúdo da campanha faz parte da chave
+        if dados is None:
+            carga = [etapa for etapa in etapas if etapa.nome == "dados"]
+            dados = executar_etapas(carga, tempos=tempos, rotulos=rotulos)["dados"]
+        chave = chave_relatorio(especificacao, payload, dados)
+
+        # 2) Demais etapas, uma vez por chave
+        restantes = [etapa for etapa in etapas if etapa.nome != "dados"]
+        registro = registro_pedido(payload)
+
+        def gerar():
+            valores = executar_etapas(restantes, {"dados": dados}, tempos, rotulos)
+            return Publicacao(
+                object_key, valores["public_url"], registro, valores["resposta"]
+            )
+
+        publicacao = get_reuso_relatorios().obter(chave, gerar)
+        if publicacao.registro == registro:
+            return publicacao.resposta.model_copy()
+
+        # 3) Documento gerado por outro pedido: registra em nome deste
+        registrar = [etapa for etapa in etapas if etapa.nome == "resposta"]
+        valores = executar_etapas(
+            registrar, {"public_url": publicacao.public_url}, tempos, rotulos
+        )
+        return valores["resposta"]
+
+
+def dados_relatorio(especificacao: EspecificacaoRelatorio, supabase: Client, payload):
+    """
+    Só a etapa "dados" do grafo (consultas do ativo, configuração e
+    campanha), medida como as demais. O resultado vai a `chave_relatorio` e
+    a `renderizar_relatorio`.
+    """
+    etapas = [
+        etapa
+        for etapa in etapas_relatorio(especificacao, supabase, payload, "")
+        if etapa.nome == "dados"
+    ]
+    rotulos = {"relatorio": especificacao.tipo}
+    return executar_etapas(etapas, rotulos=rotulos)["dados"]
+
+
+def renderizar_relatorio(
+    especificacao: EspecificacaoRelatorio,
+    supabase: Client,
+    payload,
+    dados: Optional[DadosRelatorio] = None,
+    tempos: Optional[dict] = None,
+) -> tuple:
+    """
+    Executa o grafo só até o documento renderizado, sem upload nem registro.
+    Devolve (object_key, documento); `armazenar_relatorio` completa o fluxo.
+    """
+    object_key = _object_key(payload)
+    with _medir(especificacao) as rotulos:
+        document = _ate_renderizado(
+            especificacao, supabase, payload, object_key, dados, tempos, rotulos
+        )
+    return object_key, document
+
+
+def _ate_renderizado(
+    especificacao, supabase, payload, object_key, dados, tempos, rotulos
+):
+    etapas = [
+        etapa
+        for etapa in etapas_relatorio(especificacao, supabase, payload, object_key)
+        if etapa.nome not in _ARMAZENAMENTO
+    ]
+    iniciais = {}
+    if dados is not None:
+        etapas = [etapa for etapa in etapas if etapa.nome != "dados"]
+        iniciais["dados"] = dados
+    return executar_etapas(etapas, iniciais, tempos, rotulos)["renderizado"]
+
+
+def armazenar_relatorio(
+    especificacao: EspecificacaoRelatorio, supabase: Client, payload, object_key: str, arquivo
+):
+    """
+    Envia ao bucket o .docx já salvo em `arquivo` (ver `salvar_docx`) e
+    registra o relatório no banco. Devolve `especificacao.resposta`.
+    """
+    enviar_docx(supabase, especificacao.bucket, object_key, arquivo)
+    public_url = url_publica(especificacao, supabase, object_key)
+    return _registrar(especificacao, supabase, payload, public_url)
+
+
+def registrar_relatorio(
+    especificacao: EspecificacaoRelatorio, supabase: Client, payload, public_url: str
+):
+    """
+    Registra no banco, em nome de `payload`, um relatório já publicado em
+    `public_url`. Devolve `especificacao.resposta`.
+    """
+    return _registrar(especificacao, supabase, payload, public_url)
+
+
+def _renderizar_e_salvar(especificacao, payload, dados, rotulos):
+    # sem consultas: `dados` já veio do cliente assíncrono; a duração total
+    # é medida por quem chama
+    object_key = _object_key(payload)
+    document = _ate_renderizado(
+        especificacao, None, payload, object_key, dados, None, rotulos
+    )
+    return object_key, salvar_docx(document)
+
+
+async def gerar_relatorio_async(
+    especificacao: EspecificacaoRelatorio, supabase: AsyncClient, payload
+):
+    """
+    Versão de `gerar_relatorio` para handlers async. Consultas, upload e
+    registro usam o cliente assíncrono e não ocupam threads; só a montagem
+    do documento (grafo de etapas e gravação do .docx) vai ao executor de
+    relatórios. Pedidos com a mesma chave são coalescidos junto com os
+    síncronos, com o mesmo registro por pedido de `gerar_relatorio`.
+    Duração total, etapas e falhas vão às mesmas métricas do caminho
+    síncrono.
+    """
+    loop = asyncio.get_running_loop()
+    with _medir(especificacao) as rotulos:
+        # 1) Dados e chave do relatório
+        with span(_DURACAO_ETAPA, etapa="dados", **rotulos):
+            dados = await carregar_dados_async(
+                supabase,
+                payload.ativo_id,
+                payload.data_campanha.isoformat(),
+                especificacao.formulario,
+                especificacao.colunas_formulario,
+            )
+        chave = chave_relatorio(especificacao, payload, dados)
+        registro = registro_pedido(payload)
+
+        async def gerar():
+            # 2) Documento no executor, fora do event loop (com o contexto
+            #    deste pedido, para o rastro de spans)
+            object_key, arquivo = await loop.run_in_executor(
+                _executor_async,
+                partial(
+                    contextvars.copy_context().run,
+                    _renderizar_e_salvar,
+                    especificacao,
+                    payload,
+                    dados,
+                    rotulos,
+                ),
+            )
+            # 3) Upload e registro sem bloquear
+            with span(_DURACAO_ETAPA, etapa="public_url", **rotulos):
+                try:
+                    await enviar_docx_async(
+                        supabase, especificacao.bucket, object_key, arquivo
+                    )
+                finally:
+                    arquivo.close()
+                public_url = await supabase.storage.from_(
+                    especificacao.bucket
+                ).get_public_url(object_key)
+            with span(_DURACAO_ETAPA, etapa="resposta", **rotulos):
+                resposta = await _registrar_async(
+                    especificacao, supabase, payload, public_url
+                )
+            return Publicacao(object_key, public_url, registro, resposta)
+
+        publicacao = await get_reuso_relatorios().obter_async(chave, gerar)
+        if publicacao.registro == registro:
+            return publicacao.resposta.model_copy()
+
+        # 4) Documento gerado por outro pedido: registra em nome deste
+        with span(_DURACAO_ETAPA, etapa="resposta", **rotulos):
+            return await _registrar_async(
+                especificacao, supabase, payload, publicacao.public_url
+            )
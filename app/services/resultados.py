@@ -0,0 +1,61 @@
+# app/services/resultados.py
+from dataclasses import dataclass
+
+import pandas as pd
+
+INDISPONIVEL = "Indisponível"
+
+
+@dataclass(frozen=True)
+class EsquemaResultados:
+    """
+    Colunas de `resultados` usadas por um tipo de relatório: `categorias`
+    (Ponto, Classe, Profundidade...) viram category e `medidas` viram
+    float64. As demais colunas do JSON não são carregadas.
+    """
+
+    categorias: tuple
+    medidas: tuple
+
+
+@dataclass(frozen=True)
+class ResultadosCampanha:
+    """
+    `df` tem as categorias como category (vazias = "Indisponível") e as
+    medidas como float64 (NaN onde não há número). `indisponivel` marca as
+    medidas que vieram vazias no JSON, separando-as de textos não numéricos.
+    `bruto` guarda os valores como vieram, para as tabelas do relatório.
+    """
+
+    df: pd.DataFrame
+    indisponivel: pd.DataFrame
+    bruto: pd.DataFrame
+
+    def textos(self, colunas: list) -> pd.DataFrame:
+        """Colunas como escritas no JSON, com "Indisponível" nas vazias."""
+        return self.bruto[colunas].fillna(INDISPONIVEL)
+
+
+def ler_resultados(resultados: list, esquema: EsquemaResultados) -> ResultadosCampanha:
+    """
+    Monta o DataFrame de uma campanha com o esquema do relatório, convertendo
+    cada medida para número uma única vez. Colunas do esquema que não
+    aparecem em nenhuma amostra ficam de fora, como no DataFrame do JSON
+    inteiro.
+    """
+    # 1) Só as colunas do esquema presentes nas amostras
+    presentes = set().union(*resultados) if resultados else set()
+    categorias = [c for c in esquema.categorias if c in presentes]
+    medidas = [
+        c
+        for c in dict.fromkeys(esquema.medidas)
+        if c in presentes and c not in categorias
+    ]
+    bruto = pd.DataFrame.from_records(resultados, columns=categorias + medidas)
+
+    # 2) Tipos declarados
+    valores = bruto[medidas].apply(pd.to_numeric, errors="coerce").astype(float)
+    df = pd.concat(
+        [bruto[categorias].fillna(INDISPONIVEL).astype("category"), valores], axis=1
+    )
+    return ResultadosCampanha(df=df, indisponivel=bruto[medidas].isna(), bruto=bruto)
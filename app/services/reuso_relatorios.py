@@ -0,0 +1,169 @@
+# app/services/reuso_relatorios.py
+import asyncio
+import dataclasses
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+from app.config import settings
+from app.utils.templates import versao_template
+
+
+def impressao_dados(dados) -> str:
+    """
+    Hash SHA-256 do conteúdo das linhas de um DadosRelatorio (ativo,
+    configuração e campanha). Qualquer alteração na campanha gera outro hash.
+    """
+    conteudo = json.dumps(
+        dataclasses.asdict(dados), sort_keys=True, default=str, ensure_ascii=False
+    )
+    return hashlib.sha256(conteudo.encode()).hexdigest()
+
+
+def chave_relatorio(especificacao, payload, dados) -> tuple:
+    """
+    Entradas que determinam o documento gerado, incluindo a versão do
+    template: um template editado não reaproveita documentos antigos.
+    """
+    return (
+        especificacao.tipo,
+        versao_template(especificacao.template),
+        str(payload.ativo_id),
+        payload.data_campanha.isoformat(),
+        payload.periodicidade,
+        impressao_dados(dados),
+    )
+
+
+def registro_pedido(payload) -> tuple:
+    """Campos do pedido que vão para a linha de `relatorios`, além da URL."""
+    return (
+        str(payload.user_id),
+        payload.nome_relatorio,
+        payload.descricao_relatorio,
+    )
+
+
+@dataclass(frozen=True)
+class Publicacao:
+    """
+    Documento já enviado ao Storage (`object_key` no bucket do relatório) e
+    a resposta do pedido que o gerou e registrou (`registro`, ver
+    `registro_pedido`).
+    """
+
+    object_key: str
+    public_url: str
+    registro: tuple
+    resposta: object
+
+
+class ReusoRelatorios:
+    """
+    Evita gerar e enviar de novo um documento idêntico.
+
+    - Pedidos simultâneos com a mesma chave esperam uma única geração.
+    - Publicações de sucesso ficam guardadas por `ttl` segundos (LRU de até
+      `max_entradas`); pedidos seguintes recebem o documento já publicado.
+      O registro em `relatorios` de quem não gerou fica com quem chama.
+    - Falhas (exceção ou resposta com `sucesso=False`) não são guardadas.
+    """
+
+    def __init__(self, ttl: int, max_entradas: int):
+        self._ttl = ttl
+        self._max_entradas = max_entradas
+        self._entradas = OrderedDict()  # chave -> (expira_em, Publicacao)
+        self._gerando = {}  # chave -> Future
+        self._lock = threading.Lock()
+
+    def reservar(self, chave: tuple) -> tuple:
+        """
+        (publicação guardada ou None, Future da geração, se é o dono). O
+        dono encerra a geração com `concluir` ou `falhar`, de qualquer thread.
+        """
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada and entrada[0] > time.monotonic():
+                self._entradas.move_to_end(chave)
+                return entrada[1], None, False
+            futuro = self._gerando.get(chave)
+            dono = futuro is None
+            if dono:
+                futuro = self._gerando[chave] = Future()
+            return None, futuro, dono
+
+    def concluir(self, chave: tuple, futuro, publicacao: Publicacao):
+        with self._lock:
+            self._gerando.pop(chave, None)
+            if publicacao.resposta.sucesso and self._ttl > 0:
+                self._entradas[chave] = (time.monotonic() + self._ttl, publicacao)
+                self._entradas.move_to_end(chave)
+                while len(self._entradas) > self._max_entradas:
+                    self._entradas.popitem(last=False)
+        futuro.set_result(publicacao)
+        return publicacao
+
+    def falhar(self, chave: tuple, futuro, erro: BaseException) -> None:
+        with self._lock:
+            self._gerando.pop(chave, None)
+        futuro.set_exception(erro)
+
+    def obter(self, chave: tuple, gerar: Callable[[], Publicacao]) -> Publicacao:
+        """
+        Devolve a publicação guardada para `chave`, espera a geração em
+        andamento ou chama `gerar()`.
+        """
+        publicacao, futuro, dono = self.reservar(chave)
+        if futuro is None:
+            return publicacao
+        if not dono:
+            return futuro.result()
+        try:
+            publicacao = gerar()
+        except BaseException as e:
+            self.falhar(chave, futuro, e)
+            raise
+        return self.concluir(chave, futuro, publicacao)
+
+    async def obter_async(
+        self, chave: tuple, gerar: Callable[[], Awaitable[Publicacao]]
+    ) -> Publicacao:
+        """
+        Como `obter`, com `gerar` assíncrono. Pedidos síncronos e assíncronos
+        com a mesma chave esperam a mesma geração.
+        """
+        publicacao, futuro, dono = self.reservar(chave)
+        if futuro is None:
+            return publicacao
+        if not dono:
+            return await asyncio.wrap_future(futuro)
+        try:
+            publicacao = await gerar()
+        except BaseException as e:
+            self.falhar(chave, futuro, e)
+            raise
+        return self.concluir(chave, futuro, publicacao)
+
+    def limpar(self) -> int:
+        """Descarta todas as publicações guardadas e devolve quantas eram."""
+        with self._lock:
+            removidas = len(self._entradas)
+            self._entradas.clear()
+            return removidas
+
+
+_reuso = None
+
+
+def get_reuso_relatorios() -> ReusoRelatorios:
+    global _reuso
+    if not _reuso:
+        _reuso = ReusoRelatorios(
+            settings.RELATORIOS_REUSO_TTL, settings.RELATORIOS_REUSO_MAX
+        )
+    return _reuso
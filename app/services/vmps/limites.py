@@ -0,0 +1,182 @@
+# app/services/vmps/limites.py
+import re
+from dataclasses import dataclass
+
+import numpy as np
+
+from app.services.vmps.vmp_qag import vmp_qag
+from app.services.vmps.vmp_qags import vmp_qags
+from app.services.vmps.vmp_qsd import vmp_qsd
+
+# Tipos de limite (guardados em um array int8)
+SEM_LIMITE = 0  # None, "-" ou "--"
+MAXIMO = 1  # limite superior: 3,7 / "200 col/100mL" / "250.000 (1)"
+FAIXA = 2  # limites inferior e superior: "6,0 a 9,0" / "100.000 - 700.000"
+QUALITATIVO = 3  # texto não avaliável: "Virtualmente ausentes"
+POR_PH = 4  # nitrogênio amoniacal: limite superior escolhido pelo pH da amostra
+
+COLUNA_PH = "pH (N/A)"
+
+_NUMERO = r"\d+(?:[.,]\d+)*"
+_RE_FAIXA = re.compile(rf"^({_NUMERO})\s*(?:a|-)\s*({_NUMERO})(?:\s*,.*)?$")
+_RE_MAXIMO = re.compile(
+    rf"^({_NUMERO})\s*(?:col)?\s*(?:/\s*100\s*ml)?\s*(?:\([^)]*\))?$", re.IGNORECASE
+)
+# "(pH ≤ 7,5)", "(7,5 < pH ≤ 8,0)", "(pH > 8,5)" no nome do parâmetro
+_RE_BANDA_PH = re.compile(r"\s*\(([^()]*pH[^()]*)\)")
+_RE_PH_ACIMA = re.compile(rf"^pH\s*>\s*({_NUMERO})$")
+_RE_PH_ATE = re.compile(rf"^(?:({_NUMERO})\s*<\s*)?pH\s*≤\s*({_NUMERO})$")
+
+
+def numero_br(texto: str) -> float:
+    """
+    Converte número escrito no padrão brasileiro ("0,005", "250.000",
+    "1.000.000", "6,5") para float.
+    """
+    if "," in texto:
+        return float(texto.replace(".", "").replace(",", "."))
+    if re.fullmatch(r"\d{1,3}(?:\.\d{3})+", texto):
+        return float(texto.replace(".", ""))
+    return float(texto)
+
+
+def interpretar_limite(valor):
+    """
+    Classifica um VMP do dicionário em (tipo, mínimo, máximo).
+    Limites sem número reconhecível ficam como QUALITATIVO.
+    """
+    if valor is None:
+        return SEM_LIMITE, -np.inf, np.inf
+    if isinstance(valor, (int, float)):
+        return MAXIMO, -np.inf, float(valor)
+
+    texto = str(valor).strip()
+    if texto in ("", "-", "--"):
+        return SEM_LIMITE, -np.inf, np.inf
+    encontrado = _RE_FAIXA.match(texto)
+    if encontrado:
+        return FAIXA, numero_br(encontrado[1]), numero_br(encontrado[2])
+    encontrado = _RE_MAXIMO.match(texto)
+    if encontrado:
+        return MAXIMO, -np.inf, numero_br(encontrado[1])
+    return QUALITATIVO, -np.inf, np.inf
+
+
+def banda_ph(parametro: str):
+    """
+    Extrai do nome do parâmetro a faixa de pH em que o limite vale.
+    Devolve (nome sem a faixa, ph_min, ph_max) ou None. Limites inferiores
+    estritos ("7,5 < pH") são representados pelo próximo float acima.
+    """
+    encontrado = _RE_BANDA_PH.search(parametro)
+    if not encontrado:
+        return None
+    condicao = encontrado[1].strip()
+    base = _RE_BANDA_PH.sub("", parametro, count=1)
+
+    acima = _RE_PH_ACIMA.match(condicao)
+    if acima:
+        return base, np.nextafter(numero_br(acima[1]), np.inf), np.inf
+    ate = _RE_PH_ATE.match(condicao)
+    if ate:
+        minimo = np.nextafter(numero_br(ate[1]), np.inf) if ate[1] else -np.inf
+        return base, minimo, numero_br(ate[2])
+    return None
+
+
+@dataclass
+class LimitesCompilados:
+    """
+    VMPs de uma resolução pré-processados em arrays indexados por
+    (classe, parâmetro). `minimo`, `maximo`, `ph_min` e `ph_max` têm uma
+    terceira dimensão com as bandas de pH; limites que não dependem do pH
+    usam só a banda 0.
+    """
+
+    classes: list
+    parametros: list
+    idx_classe: dict
+    idx_parametro: dict
+    existe: np.ndarray  # bool [C, P]: parâmetro listado para a classe
+    tipo: np.ndarray  # int8 [C, P]
+    minimo: np.ndarray  # float [C, P, B]
+    maximo: np.ndarray  # float [C, P, B]
+    ph_min: np.ndarray  # float [C, P, B]
+    ph_max: np.ndarray  # float [C, P, B]
+    original: np.ndarray  # object [C, P]: valor como escrito no dicionário
+
+
+def compilar_limites(vmp: dict) -> LimitesCompilados:
+    """
+    Interpreta uma única vez todos os VMPs do dicionário
+    {classe: {parâmetro: limite}}.
+
+    Parâmetros com faixa de pH no nome ("Nitrogênio amoniacal total
+    (pH ≤ 7,5) (mg/L N)") viram limites POR_PH de uma banda, e o nome sem a
+    faixa ("Nitrogênio amoniacal total (mg/L N)") recebe todas as bandas,
+    para que o resultado medido seja comparado com a banda do pH da amostra.
+    """
+    # 1) Regras por (classe, parâmetro): lista de (tipo, min, max, ph_min, ph_max, original)
+    regras = {}
+    for classe, limites in vmp.items():
+        bandas = {}
+        for parametro, valor in limites.items():
+            tipo, minimo, maximo = interpretar_limite(valor)
+            banda = banda_ph(parametro)
+            if banda and tipo == MAXIMO:
+                base, ph_min, ph_max = banda
+                regra = (POR_PH, minimo, maximo, ph_min, ph_max, valor)
+                regras[(classe, parametro)] = [regra]
+                bandas.setdefault(base, []).append(regra)
+            else:
+                regras[(classe, parametro)] = [
+                    (tipo, minimo, maximo, -np.inf, np.inf, valor)
+                ]
+        for base, lista in bandas.items():
+            regras.setdefault((classe, base), lista)
+
+    # 2) Índices de classes e parâmetros
+    classes = list(vmp)
+    parametros = list(dict.fromkeys(p for _, p in regras))
+    idx_classe = {c: i for i, c in enumerate(classes)}
+    idx_parametro = {p: i for i, p in enumerate(parametros)}
+    n_bandas = max(len(lista) for lista in regras.values())
+    forma = (len(classes), len(parametros))
+
+    # 3) Arrays compactos
+    existe = np.zeros(forma, dtype=bool)
+    tipo = np.full(forma, SEM_LIMITE, dtype=np.int8)
+    minimo = np.full(forma + (n_bandas,), -np.inf)
+    maximo = np.full(forma + (n_bandas,), np.inf)
+    ph_min = np.full(forma + (n_bandas,), np.inf)  # bandas vazias nunca valem
+    ph_max = np.full(forma + (n_bandas,), -np.inf)
+    original = np.full(forma, None, dtype=object)
+
+    for (classe, parametro), lista in regras.items():
+        c, p = idx_classe[classe], idx_parametro[parametro]
+        existe[c, p] = True
+        tipo[c, p] = lista[0][0]
+        original[c, p] = lista[0][5] if len(lista) == 1 else None
+        for b, (_, mn, mx, pmin, pmax, _) in enumerate(lista):
+            minimo[c, p, b], maximo[c, p, b] = mn, mx
+            ph_min[c, p, b], ph_max[c, p, b] = pmin, pmax
+
+    return LimitesCompilados(
+        classes=classes,
+        parametros=parametros,
+        idx_classe=idx_classe,
+        idx_parametro=idx_parametro,
+        existe=existe,
+        tipo=tipo,
+        minimo=minimo,
+        maximo=maximo,
+        ph_min=ph_min,
+        ph_max=ph_max,
+        original=original,
+    )
+
+
+# Compilados uma única vez, na importação
+limites_qag = compilar_limites(vmp_qag)
+limites_qsd = compilar_limites(vmp_qsd)
+limites_qags = compilar_limites(vmp_qags)
@@ -1,4 +1,4 @@
-{
+vmp_qags = {
     "Consumo Humano": {
         "Alumínio": "200 (1)",
         "Antimônio": 5,
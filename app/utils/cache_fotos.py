@@ -0,0 +1,200 @@
+# app/utils/cache_fotos.py
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Optional
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from app.config import settings
+
+# Estrutura do diretório de cache:
+#   urls/<sha256(url)>.json        -> {"url", "etag", "conteudo", "verificado_em"}
+#   variantes/<sha256(original)>.jpg -> foto reduzida para o espaço de 5 cm
+# As variantes são endereçadas pelo conteúdo original, então a mesma foto
+# publicada em URLs diferentes ocupa espaço uma única vez.
+
+_lock = threading.Lock()
+_ultima_limpeza = 0.0
+INTERVALO_LIMPEZA = 60  # segundos entre varreduras do disco
+
+
+def _sha256(dados: bytes) -> str:
+    return hashlib.sha256(dados).hexdigest()
+
+
+def _caminho_indice(url: str) -> str:
+    return os.path.join(
+        settings.FOTO_CACHE_DIR, "urls", _sha256(url.encode()) + ".json"
+    )
+
+
+def _caminho_variante(conteudo: str) -> str:
+    return os.path.join(settings.FOTO_CACHE_DIR, "variantes", conteudo + ".jpg")
+
+
+def _escrever_atomico(caminho: str, dados: bytes) -> None:
+    # nome único entre threads e processos (workers do uvicorn)
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    tmp = f"{caminho}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(dados)
+        os.replace(tmp, caminho)
+    except OSError:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def reduzir_foto(dados: bytes, largura_px: int) -> bytes:
+    """
+    Reduz a foto para `largura_px` de largura (mantendo a proporção) e
+    recomprime em JPEG. Se o conteúdo não for uma imagem reconhecida,
+    devolve os bytes originais.
+    """
+    try:
+        img = Image.open(io.BytesIO(dados))
+        img = ImageOps.exif_transpose(img)
+    except (UnidentifiedImageError, OSError):
+        return dados
+    if img.width > largura_px:
+        altura = max(1, round(img.height * largura_px / img.width))
+        img = img.resize((largura_px, altura), Image.LANCZOS)
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", quality=85, optimize=True)
+    return buf.getvalue()
+
+
+def ler(url: str) -> Optional[dict]:
+    """
+    Devolve a entrada do cache para a URL (com a variante em `dados`) ou
+    None se não houver variante válida em disco.
+    """
+    try:
+        with open(_caminho_indice(url), "rb") as f:
+            entrada = json.load(f)
+        caminho = _caminho_variante(entrada["conteudo"])
+        with open(caminho, "rb") as f:
+            entrada["dados"] = f.read()
+        # marca o acesso para a política LRU
+        os.utime(caminho, None)
+    except (OSError, ValueError, KeyError):
+        return None
+    return entrada
+
+
+def expirada(entrada: dict) -> bool:
+    return time.time() - entrada["verificado_em"] > settings.FOTO_CACHE_TTL
+
+
+def revalidar(url: str, entrada: dict) -> None:
+    """Registra que o servidor confirmou (304) a versão em cache."""
+    indice = {k: v for k, v in entrada.items() if k != "dados"}
+    indice["verificado_em"] = time.time()
+    try:
+        _escrever_atomico(_caminho_indice(url), json.dumps(indice).encode())
+    except OSError:
+        # o cache em disco é só uma otimização
+        pass
+
+
+def _ler_variante(caminho: str) -> Optional[bytes]:
+    try:
+        with open(caminho, "rb") as f:
+            variante = f.read()
+        os.utime(caminho, None)
+    except OSError:
+        return None
+    return variante
+
+
+def _limpar_se_preciso() -> None:
+    global _ultima_limpeza
+    with _lock:
+        if time.time() - _ultima_limpeza <= INTERVALO_LIMPEZA:
+            return
+        _ultima_limpeza = time.time()
+    limpar()
+
+
+def gravar(url: str, original: bytes, etag: Optional[str]) -> bytes:
+    """
+    Reduz a foto baixada, grava a variante e o índice da URL e devolve os
+    bytes reduzidos. Falhas de disco não impedem a devolução da foto.
+    """
+    conteudo = _sha256(original)
+    caminho = _caminho_variante(conteudo)
+    variante = _ler_variante(caminho)
+    try:
+        if variante is None:
+            variante = reduzir_foto(original, settings.FOTO_LARGURA_PX)
+            _escrever_atomico(caminho, variante)
+        indice = {
+            "url": url,
+            "etag": etag,
+            "conteudo": conteudo,
+            "verificado_em": time.time(),
+        }
+        _escrever_atomico(_caminho_indice(url), json.dumps(indice).encode())
+        _limpar_se_preciso()
+    except OSError:
+        # o cache em disco é só uma otimização
+        pass
+    return variante
+
+
+def limpar() -> None:
+    """
+    Remove variantes sem uso há mais de FOTO_CACHE_MAX_AGE e, se o cache
+    ainda passar de FOTO_CACHE_MAX_BYTES, as menos usadas recentemente.
+    Índices que apontam para variantes removidas viram falhas de cache.
+    """
+    pasta = os.path.join(settings.FOTO_CACHE_DIR, "variantes")
+    with _lock:
+        try:
+            nomes = os.listdir(pasta)
+        except FileNotFoundError:
+            return
+        agora = time.time()
+        arquivos = []
+        for nome in nomes:
+            if not nome.endswith(".jpg"):
+                continue
+            caminho = os.path.join(pasta, nome)
+            try:
+                st = os.stat(caminho)
+                if agora - st.st_mtime > settings.FOTO_CACHE_MAX_AGE:
+                    os.remove(caminho)
+                    continue
+            except FileNotFoundError:
+                continue
+            arquivos.append((st.st_mtime, st.st_size, caminho))
+
+        # índices de URLs não revalidadas há muito tempo
+        pasta_urls = os.path.join(settings.FOTO_CACHE_DIR, "urls")
+        for nome in os.listdir(pasta_urls) if os.path.isdir(pasta_urls) else []:
+            caminho = os.path.join(pasta_urls, nome)
+            try:
+                if agora - os.stat(caminho).st_mtime > settings.FOTO_CACHE_MAX_AGE:
+                    os.remove(caminho)
+            except FileNotFoundError:
+                continue
+
+        total = sum(tamanho for _, tamanho, _ in arquivos)
+        for _, tamanho, caminho in sorted(arquivos):
+            if total <= settings.FOTO_CACHE_MAX_BYTES:
+                break
+            try:
+                os.remove(caminho)
+            except FileNotFoundError:
+                pass
+            total -= tamanho
@@ -0,0 +1,160 @@
+# app/utils/cache_graficos.py
+import hashlib
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+from app.config import settings
+
+# Os PNGs ficam em memória (LRU limitado a GRAFICOS_CACHE_MEM_BYTES) e em
+# disco (GRAFICOS_CACHE_DIR/<chave>.png, LRU por mtime). A chave é o hash
+# dos dados que entram no gráfico, então qualquer mudança nos resultados,
+# na classe, no VMP ou no estilo gera uma chave nova.
+
+_memoria = OrderedDict()
+_bytes_memoria = 0
+_lock = threading.Lock()
+_ultima_limpeza = 0.0
+INTERVALO_LIMPEZA = 60  # segundos entre varreduras do disco
+
+
+def _atualizar(h, valor) -> None:
+    if isinstance(valor, dict):
+        for k in sorted(valor):
+            h.update(f"<{k}>".encode())
+            _atualizar(h, valor[k])
+    elif isinstance(valor, (list, tuple)):
+        h.update(f"[{len(valor)}".encode())
+        for item in valor:
+            _atualizar(h, item)
+        h.update(b"]")
+    elif isinstance(valor, np.ndarray):
+        if valor.dtype == object:
+            _atualizar(h, valor.tolist())
+        else:
+            h.update(f"{valor.dtype.str}{valor.shape}".encode())
+            h.update(np.ascontiguousarray(valor).tobytes())
+    else:
+        h.update(f"{type(valor).__name__}:{valor!r};".encode())
+
+
+def chave_grafico(tipo: str, versao: int, dados) -> str:
+    """
+    Hash SHA-256 do tipo de gráfico, da versão de estilo e dos dados de
+    entrada (dicionários, listas, arrays NumPy e escalares).
+    """
+    h = hashlib.sha256(f"{tipo}:{versao};".encode())
+    _atualizar(h, dados)
+    return h.hexdigest()
+
+
+def _caminho(chave: str) -> str:
+    return os.path.join(settings.GRAFICOS_CACHE_DIR, chave + ".png")
+
+
+def _guardar_memoria(chave: str, png: bytes) -> None:
+    global _bytes_memoria
+    with _lock:
+        if chave in _memoria:
+            _memoria.move_to_end(chave)
+            return
+        _memoria[chave] = png
+        _bytes_memoria += len(png)
+        while _bytes_memoria > settings.GRAFICOS_CACHE_MEM_BYTES and _memoria:
+            _, antigo = _memoria.popitem(last=False)
+            _bytes_memoria -= len(antigo)
+
+
+def ler(chave: str) -> Optional[bytes]:
+    """PNG em cache para a chave (memória, depois disco) ou None."""
+    with _lock:
+        png = _memoria.get(chave)
+        if png is not None:
+            _memoria.move_to_end(chave)
+            return png
+    caminho = _caminho(chave)
+    try:
+        with open(caminho, "rb") as f:
+            png = f.read()
+        # marca o acesso para a política LRU
+        os.utime(caminho, None)
+    except OSError:
+        return None
+    _guardar_memoria(chave, png)
+    return png
+
+
+def _limpar_se_preciso() -> None:
+    global _ultima_limpeza
+    # só uma thread por intervalo faz a varredura
+    with _lock:
+        if time.time() - _ultima_limpeza <= INTERVALO_LIMPEZA:
+            return
+        _ultima_limpeza = time.time()
+    limpar()
+
+
+def gravar(chave: str, png: bytes) -> None:
+    _guardar_memoria(chave, png)
+    caminho = _caminho(chave)
+    # nome único entre threads e processos (workers do uvicorn, pool de gráficos)
+    tmp = f"{caminho}.{uuid.uuid4().hex}.tmp"
+    try:
+        os.makedirs(settings.GRAFICOS_CACHE_DIR, exist_ok=True)
+        with open(tmp, "wb") as f:
+            f.write(png)
+        os.replace(tmp, caminho)
+    except OSError:
+        # o cache em disco é só uma otimização
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        return
+    _limpar_se_preciso()
+
+
+def limpar() -> None:
+    """
+    Remove os PNGs menos usados recentemente enquanto o cache em disco
+    passar de GRAFICOS_CACHE_MAX_BYTES.
+    """
+    pasta = settings.GRAFICOS_CACHE_DIR
+    try:
+        nomes = os.listdir(pasta)
+    except FileNotFoundError:
+        return
+    arquivos = []
+    for nome in nomes:
+        if not nome.endswith(".png"):
+            continue
+        caminho = os.path.join(pasta, nome)
+        try:
+            st = os.stat(caminho)
+        except FileNotFoundError:
+            continue
+        arquivos.append((st.st_mtime, st.st_size, caminho))
+
+    total = sum(tamanho for _, tamanho, _ in arquivos)
+    for _, tamanho, caminho in sorted(arquivos):
+        if total <= settings.GRAFICOS_CACHE_MAX_BYTES:
+            break
+        try:
+            os.remove(caminho)
+        except FileNotFoundError:
+            pass
+        total -= tamanho
+
+
+def obter_ou_desenhar(chave: str, desenhar) -> bytes:
+    """Devolve o PNG em cache ou chama `desenhar()` e guarda o resultado."""
+    png = ler(chave)
+    if png is None:
+        png = desenhar()
+        gravar(chave, png)
+    return png
@@ -1,6 +1,16 @@
 # app/utils/file_utils.py
+import io
+import shutil
+import tempfile
+
+from supabase import AsyncClient, Client
+
+from app.config import settings
+
+DOCX_CONTENT_TYPE = (
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+)
 
-from supabase import Client
 
 def create_signed_url(supabase: Client, bucket: str, path: str, expires_in: int) -> str:
     """
@@ -14,3 +24,90 @@ def create_signed_url(supabase: Client, bucket: str, path: str, expires_in: int)
     if resp.get("error"):
         raise Exception(f"Erro ao criar signed URL: {resp['error']['message']}")
     return resp["signedURL"]
+
+
+def salvar_docx(document):
+    """
+    Salva o documento em um SpooledTemporaryFile posicionado no início: fica
+    em memória até DOCX_SPOOL_MAX_BYTES e, acima disso, vai para um arquivo
+    anônimo em disco. Quem chama fecha o buffer.
+    """
+    buf = tempfile.SpooledTemporaryFile(max_size=settings.DOCX_SPOOL_MAX_BYTES)
+    try:
+        document.save(buf)
+    except BaseException:
+        buf.close()
+        raise
+    buf.seek(0)
+    return buf
+
+
+def enviar_docx(supabase: Client, bucket: str, path: str, buf) -> None:
+    """
+    Envia ao Storage o conteúdo de um buffer de `salvar_docx`, desde o
+    início, sem fechá-lo.
+    """
+    tamanho = buf.seek(0, io.SEEK_END)
+    buf.seek(0)
+    if tamanho <= settings.DOCX_SPOOL_MAX_BYTES:
+        # ainda em memória: o storage aceita os bytes diretamente
+        supabase.storage.from_(bucket).upload(
+            path, buf.read(), {"contentType": DOCX_CONTENT_TYPE}
+        )
+        return
+    # já no disco: envia em streaming por um leitor sobre o mesmo arquivo
+    with open(buf.fileno(), "rb", closefd=False) as leitor:
+        supabase.storage.from_(bucket).upload(
+            path, leitor, {"contentType": DOCX_CONTENT_TYPE}
+        )
+
+
+async def enviar_docx_async(supabase: AsyncClient, bucket: str, path: str, buf) -> None:
+    """Como `enviar_docx`, pelo cliente assíncrono."""
+    tamanho = buf.seek(0, io.SEEK_END)
+    buf.seek(0)
+    if tamanho <= settings.DOCX_SPOOL_MAX_BYTES:
+        await supabase.storage.from_(bucket).upload(
+            path, buf.read(), {"contentType": DOCX_CONTENT_TYPE}
+        )
+        return
+    with open(buf.fileno(), "rb", closefd=False) as leitor:
+        await supabase.storage.from_(bucket).upload(
+            path, leitor, {"contentType": DOCX_CONTENT_TYPE}
+        )
+
+
+def copiar_docx(buf):
+    """
+    Cópia independente de um buffer de `salvar_docx`, posicionada no início,
+    para ser lida em outra thread. Quem chama fecha a cópia.
+    """
+    copia = tempfile.SpooledTemporaryFile(max_size=settings.DOCX_SPOOL_MAX_BYTES)
+    try:
+        buf.seek(0)
+        shutil.copyfileobj(buf, copia)
+    except BaseException:
+        copia.close()
+        raise
+    buf.seek(0)
+    copia.seek(0)
+    return copia
+
+
+def iterar_docx(buf, tamanho_bloco: int = 64 * 1024):
+    """Blocos de um buffer de `salvar_docx`, desde o início, sem fechá-lo."""
+    buf.seek(0)
+    while bloco := buf.read(tamanho_bloco):
+        yield bloco
+
+
+def upload_docx(supabase: Client, bucket: str, path: str, document) -> None:
+    """
+    Salva o documento em um buffer temporário e envia ao Storage sem passar
+    por um arquivo nomeado em disco.
+    - O buffer fica em memória até DOCX_SPOOL_MAX_BYTES; acima disso o
+      próprio SpooledTemporaryFile passa para um arquivo anônimo em disco.
+    - O buffer é descartado ao final, com ou sem erro no upload.
+    """
+    with salvar_docx(document) as buf:
+        enviar_docx(supabase, bucket, path, buf)
@@ -0,0 +1,69 @@
+# app/utils/fotos.py
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+from app.clients.http import get_http_session
+from app.config import settings
+from app.utils import cache_fotos
+
+_executor = ThreadPoolExecutor(
+    max_workers=settings.FOTO_MAX_WORKERS, thread_name_prefix="fotos"
+)
+
+
+def _baixar(url: str, etag: Optional[str] = None) -> Tuple[int, bytes, Optional[str]]:
+    """
+    Faz o GET da imagem pela sessão compartilhada, respeitando o timeout e o
+    tamanho máximo configurados. Com `etag`, faz uma requisição condicional
+    e devolve status 304 (sem conteúdo) se a imagem não mudou.
+    """
+    headers = {"If-None-Match": etag} if etag else {}
+    with get_http_session().get(
+        url, headers=headers, timeout=settings.FOTO_TIMEOUT, stream=True
+    ) as resp:
+        resp.raise_for_status()  # levanta exceção se status != 200
+        if resp.status_code == 304:
+            return 304, b"", etag
+        tamanho = resp.headers.get("Content-Length")
+        if tamanho and int(tamanho) > settings.FOTO_MAX_BYTES:
+            raise ValueError(f"Imagem excede o tamanho máximo permitido: {url}")
+
+        partes = []
+        total = 0
+        for parte in resp.iter_content(chunk_size=64 * 1024):
+            total += len(parte)
+            if total > settings.FOTO_MAX_BYTES:
+                raise ValueError(f"Imagem excede o tamanho máximo permitido: {url}")
+            partes.append(parte)
+    return resp.status_code, b"".join(partes), resp.headers.get("ETag")
+
+
+def baixar_foto(url: str) -> bytes:
+    """Baixa a imagem original, sem passar pelo cache."""
+    _, dados, _ = _baixar(url)
+    return dados
+
+
+def baixar_foto_reduzida(url: str) -> bytes:
+    """
+    Devolve a foto já reduzida para o espaço de 5 cm do relatório, usando o
+    cache em disco. Entradas recentes não tocam a rede; as mais antigas são
+    revalidadas pelo ETag antes de baixar de novo.
+    """
+    entrada = cache_fotos.ler(url)
+    if entrada and not cache_fotos.expirada(entrada):
+        return entrada["dados"]
+
+    status, dados, etag = _baixar(url, entrada["etag"] if entrada else None)
+    if status == 304 and entrada:
+        cache_fotos.revalidar(url, entrada)
+        return entrada["dados"]
+    return cache_fotos.gravar(url, dados, etag)
+
+
+def baixar_fotos(urls: List[str]) -> List[bytes]:
+    """
+    Baixa todas as imagens de um relatório em paralelo (já reduzidas, via
+    cache), devolvendo o conteúdo na mesma ordem das URLs.
+    """
+    return list(_executor.map(baixar_foto_reduzida, urls))
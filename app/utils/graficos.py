@@ -1,32 +1,85 @@
-import matplotlib.pyplot as plt # type: ignore
+import io
+import threading
+from functools import partial
+
 import numpy as np # type: ignore
 import pandas as pd # type: ignore
+from matplotlib.backends.backend_agg import FigureCanvasAgg # type: ignore
+from matplotlib.figure import Figure # type: ignore
+
+from app.utils.cache_graficos import chave_grafico, obter_ou_desenhar
+
+# Os gráficos usam a API orientada a objetos do Agg, sem o estado global do
+# pyplot: cada thread reaproveita uma única Figure, que é limpa a cada uso.
+# Assim nenhuma figura fica registrada entre requisições.
+_local = threading.local()
+
+# Entra no hash de cache de todos os gráficos: incrementar ao mudar cores,
+# tamanhos, rótulos ou qualquer outro detalhe visual.
+VERSAO_ESTILO = 1
+
+CATEGORIAS_GRANULOMETRIA = [
+    "Areia muito grossa (%)",
+    "Areia grossa (%)",
+    "Areia média (%)",
+    "Areia fina (%)",
+    "Areia muito fina (%)",
+    "Silte (%)",
+    "Argila (%)",
+]
+CORES_GRANULOMETRIA = [
+    "#00b0f0",
+    "#0070c0",
+    "#00b050",
+    "#7030a0",
+    "#002060",
+    "#76933c",
+    "#f4b084",
+]
+
+
+def _nova_figura(largura: float, altura: float, dpi: int = 100):
+    """Devolve a Figure da thread, limpa e redimensionada, e um novo Axes."""
+    fig = getattr(_local, "figura", None)
+    if fig is None:
+        fig = Figure()
+        FigureCanvasAgg(fig)
+        _local.figura = fig
+    fig.clear()
+    fig.set_size_inches(largura, altura)
+    fig.set_dpi(dpi)
+    return fig, fig.add_subplot()
+
+
+def _png(fig) -> bytes:
+    """Renderiza a figura em PNG e libera os artistas desenhados."""
+    buf = io.BytesIO()
+    try:
+        fig.savefig(buf, format="png", dpi=120, bbox_inches="tight")
+    finally:
+        fig.clear()
+    return buf.getvalue()
 
 
 def gera_distribuicao_granulometrica_qsd(dados):
+    chave = chave_grafico(
+        "granulometria_qsd",
+        VERSAO_ESTILO,
+        {
+            "amostras": [str(i) for i in dados.index],
+            "valores": dados[CATEGORIAS_GRANULOMETRIA].to_numpy(),
+        },
+    )
+    return obter_ou_desenhar(chave, partial(_desenhar_granulometria, dados))
 
-    categorias = [
-        "Areia muito grossa (%)",
-        "Areia grossa (%)",
-        "Areia média (%)",
-        "Areia fina (%)",
-        "Areia muito fina (%)",
-        "Silte (%)",
-        "Argila (%)",
-    ]
-    cores = [
-        "#00b0f0",
-        "#0070c0",
-        "#00b050",
-        "#7030a0",
-        "#002060",
-        "#76933c",
-        "#f4b084",
-    ]
+
+def _desenhar_granulometria(dados) -> bytes:
+    categorias = CATEGORIAS_GRANULOMETRIA
+    cores = CORES_GRANULOMETRIA
 
     x = np.arange(dados.shape[0])
 
-    fig, ax = plt.subplots(figsize=(8, 6), dpi=120)
+    fig, ax = _nova_figura(8, 6, dpi=120)
     bottom = np.zeros(dados.shape[0])
 
     for i, cat in enumerate(categorias):
@@ -53,11 +106,8 @@ def gera_distribuicao_granulometrica_qsd(dados):
     ax.grid(axis="y", linestyle=":", alpha=0.5)
     ax.spines["top"].set_visible(False)
     ax.spines["right"].set_visible(False)
-    plt.tight_layout()
-    return fig
-
-
-import matplotlib.pyplot as plt # type: ignore
+    fig.tight_layout()
+    return _png(fig)
 
 
 def graficos_linha_com_vmp_por_classe_qsd(
@@ -72,133 +122,226 @@ def graficos_linha_com_vmp_por_classe_qsd(
         if col == eixo_x or col == classe_col:
             continue
 
-        fig, ax = plt.subplots(figsize=(8, 5), dpi=120)
-        ax.plot(dados[eixo_x].values, dados[col].values, marker="o", label="Amostras")
+        classes = dados[classe_col].to_numpy()
+        chave = chave_grafico(
+            "linha_vmp_qsd",
+            VERSAO_ESTILO,
+            {
+                "coluna": col,
+                "eixo_x": eixo_x,
+                "x": dados[eixo_x].to_numpy(),
+                "y": dados[col].to_numpy(),
+                "classes": classes,
+                "vmp": {str(c): vmp_dict.get(c, {}).get(col) for c in set(classes)},
+            },
+        )
+        figuras.append(
+            obter_ou_desenhar(
+                chave,
+                partial(_desenhar_linha_qsd, dados, col, vmp_dict, eixo_x, classe_col),
+            )
+        )
+
+    return figuras
+
+
+def _desenhar_linha_qsd(dados, col, vmp_dict, eixo_x, classe_col) -> bytes:
+    fig, ax = _nova_figura(8, 5, dpi=120)
+    ax.plot(
+        dados[eixo_x].to_numpy(), dados[col].to_numpy(), marker="o", label="Amostras"
+    )
+
+    # Linha da média dos pontos
+    media = dados[col].mean()
+    ax.axhline(
+        y=media,
+        color="blue",
+        linestyle="-.",
+        linewidth=1.5,
+        label=f"Média ({media:.2f})",
+    )
 
-        # Linha da média dos pontos
-        media = dados[col].mean()
+    # Linhas VMP por classe
+    for i, row in dados.iterrows():
+        classe = row[classe_col]
+        vmp = vmp_dict.get(classe, {}).get(col, None)
+        if vmp is not None:
+            ax.axhline(y=vmp, color="red", linestyle="--", linewidth=1.0, alpha=0.5)
+
+    # Legenda do VMP
+    classes_usadas = dados[classe_col].unique()
+    legenda = (
+        "VMP (por classe)"
+        if len(classes_usadas) > 1
+        else f"VMP ({classes_usadas[0]})"
+    )
+    valor_legenda = vmp_dict.get(classes_usadas[0], {}).get(col, None)
+    if valor_legenda is not None:
         ax.axhline(
-            y=media,
-            color="blue",
-            linestyle="-.",
+            y=valor_legenda,
+            color="red",
+            linestyle="--",
             linewidth=1.5,
-            label=f"Média ({media:.2f})",
+            label=legenda,
         )
 
-        # Linhas VMP por classe
-        for i, row in dados.iterrows():
-            classe = row[classe_col]
-            vmp = vmp_dict.get(classe, {}).get(col, None)
-            if vmp is not None:
-                ax.axhline(y=vmp, color="red", linestyle="--", linewidth=1.0, alpha=0.5)
-
-        # Legenda do VMP
-        classes_usadas = dados[classe_col].unique()
-        legenda = (
-            "VMP (por classe)"
-            if len(classes_usadas) > 1
-            else f"VMP ({classes_usadas[0]})"
-        )
-        valor_legenda = vmp_dict.get(classes_usadas[0], {}).get(col, None)
-        if valor_legenda is not None:
-            ax.axhline(
-                y=valor_legenda,
-                color="red",
-                linestyle="--",
-                linewidth=1.5,
-                label=legenda,
-            )
+    ax.set_xlabel(eixo_x)
+    ax.set_ylabel(col)
+    ax.set_title(f"{col} vs {eixo_x}")
+    ax.legend()
+    fig.tight_layout()
 
-        ax.set_xlabel(eixo_x)
-        ax.set_ylabel(col)
-        ax.set_title(f"{col} vs {eixo_x}")
-        ax.legend()
-        fig.tight_layout()
+    return _png(fig)
 
-        figuras.append(fig)
 
-    return figuras
+def specs_qualidade_agua(medias, parametros, classe, vmp_qag) -> list:
+    """
+    Prepara os dados dos gráficos por parâmetro (barras por profundidade,
+    médias e limite CONAMA) sem desenhar nada. `medias` tem as médias da
+    classe por (Ponto, Profundidade), uma coluna por parâmetro (ver
+    `EstatisticasCampanha.medias_por_ponto`). Cada spec é um dicionário
+    leve, serializável para os processos de renderização.
+    """
+    specs = []
+    for parametro in parametros:
 
-
-def grafico_qualidade_agua(df, parametro, classe, vmp_qag):
-    figs = []
-    for parametro in parametro:
-
-        # Garantir que a coluna existe e é numérica
-        if parametro not in df.columns:
+        # Garantir que a coluna existe
+        if parametro not in medias.columns:
             raise ValueError(f"Parâmetro '{parametro}' não encontrado no DataFrame.")
-        df[parametro] = pd.to_numeric(df[parametro], errors="coerce")
 
-        # Agrupar e pivotar
-        df_grouped = df.groupby(["Ponto", "Profundidade"])[parametro].mean().unstack()
+        # Pivotar: pontos nas linhas, profundidades nas colunas
+        df_grouped = medias[parametro].unstack()
         pontos = df_grouped.index
-        x = np.arange(len(pontos))
-        width = 0.2
-
-        # Obter valores para profundidades
-        superficie = df_grouped.get(
-            "Superfície", pd.Series([np.nan] * len(pontos), index=pontos)
-        ).values
-        meio = df_grouped.get(
-            "Meio", pd.Series([np.nan] * len(pontos), index=pontos)
-        ).values
-        fundo = df_grouped.get(
-            "Fundo", pd.Series([np.nan] * len(pontos), index=pontos)
-        ).values
-
-        # Média total e média por ponto
-        media_total = np.full(
-            len(pontos), np.nanmean(np.concatenate([superficie, meio, fundo]))
-        )
-        media_ponto = np.nanmean([superficie, meio, fundo], axis=0)
+        vazio = np.full(len(pontos), np.nan)
 
         # Valor do VMP
         vmp_valor = vmp_qag.get(classe, {}).get(parametro, None)
         if isinstance(vmp_valor, str) or vmp_valor is None:
-            conama_limite = np.full(len(pontos), np.nan)
+            limite = None
             limite_str = f"(sem limite numérico)"
         else:
-            # cria linha constante no valor do limite
-            conama_limite = np.full(len(pontos), float(vmp_valor))
+            limite = float(vmp_valor)
             limite_str = f"(Limite CONAMA: {vmp_valor})"
 
-        # Plot
-        fig, ax = plt.subplots(figsize=(12, 6))
-        ax.bar(x - width, superficie, width, label="Superfície", color="#0072B2")
-        ax.bar(x, meio, width, label="Meio", color="#E69F00")
-        ax.bar(x + width, fundo, width, label="Fundo", color="#009E73")
-
-        ax.plot(
-            x,
-            media_total,
-            label="Média total",
-            color="#56B4E9",
-            linewidth=2,
-        )
-        ax.plot(
-            x,
-            media_ponto,
-            label="Média ponto",
-            color="olive",
-            linestyle="--",
-            linewidth=2,
+        # Obter valores para profundidades
+        profundidades = {
+            chave: df_grouped[coluna].to_numpy(float)
+            if coluna in df_grouped
+            else vazio
+            for chave, coluna in (
+                ("superficie", "Superfície"),
+                ("meio", "Meio"),
+                ("fundo", "Fundo"),
+            )
+        }
+
+        specs.append(
+            {
+                "pontos": [str(p) for p in pontos],
+                **profundidades,
+                "limite": limite,
+                "titulo": f"{parametro} - {classe} {limite_str}",
+            }
         )
-        ax.plot(
-            x,
-            conama_limite,
-            label="CONAMA",
-            color="red",
-            linestyle="--",
-            linewidth=3,
+    return specs
+
+
+def chave_qualidade_agua(spec: dict) -> str:
+    """Chave de cache de um spec de `specs_qualidade_agua`."""
+    return chave_grafico("qualidade_agua", VERSAO_ESTILO, spec)
+
+
+def desenhar_qualidade_agua(spec: dict) -> bytes:
+    """Desenha um gráfico de `specs_qualidade_agua` e devolve o PNG."""
+    superficie, meio, fundo = spec["superficie"], spec["meio"], spec["fundo"]
+    x = np.arange(len(spec["pontos"]))
+    width = 0.2
+
+    # Média total e média por ponto
+    media_total = np.full(
+        len(x), np.nanmean(np.concatenate([superficie, meio, fundo]))
+    )
+    media_ponto = np.nanmean([superficie, meio, fundo], axis=0)
+
+    # cria linha constante no valor do limite
+    limite = spec["limite"]
+    conama_limite = np.full(len(x), np.nan if limite is None else limite)
+
+    # Plot
+    fig, ax = _nova_figura(12, 6)
+    ax.bar(x - width, superficie, width, label="Superfície", color="#0072B2")
+    ax.bar(x, meio, width, label="Meio", color="#E69F00")
+    ax.bar(x + width, fundo, width, label="Fundo", color="#009E73")
+
+    ax.plot(
+        x,
+        media_total,
+        label="Média total",
+        color="#56B4E9",
+        linewidth=2,
+    )
+    ax.plot(
+        x,
+        media_ponto,
+        label="Média ponto",
+        color="olive",
+        linestyle="--",
+        linewidth=2,
+    )
+    ax.plot(
+        x,
+        conama_limite,
+        label="CONAMA",
+        color="red",
+        linestyle="--",
+        linewidth=3,
+    )
+
+    ax.set_xticks(x)
+    ax.set_xticklabels(spec["pontos"], rotation=45)
+    ax.set_ylabel("Concentração (mg/L)")
+    ax.set_title(spec["titulo"])
+    ax.legend()
+    ax.grid(True, axis="y", linestyle="--", alpha=0.7)
+
+    return _png(fig)
+
+
+def grafico_qualidade_agua(medias, parametro, classe, vmp_qag):
+    return [
+        obter_ou_desenhar(
+            chave_qualidade_agua(spec), partial(desenhar_qualidade_agua, spec)
         )
+        for spec in specs_qualidade_agua(medias, parametro, classe, vmp_qag)
+    ]
 
-        ax.set_xticks(x)
-        ax.set_xticklabels(pontos, rotation=45)
-        ax.set_ylabel("Concentração (mg/L)")
-        ax.set_title(f"{parametro} - {classe} {limite_str}")
-        ax.legend()
-        ax.grid(True, axis="y", linestyle="--", alpha=0.7)
 
-        figs.append(fig)
+def chave_serie_historica(spec: dict) -> str:
+    """Chave de cache de um spec de série histórica."""
+    return chave_grafico("serie_historica", VERSAO_ESTILO, spec)
+
+
+def desenhar_serie_historica(spec: dict) -> bytes:
+    """
+    Desenha a evolução de um parâmetro ao longo das campanhas: uma linha por
+    ponto (média das amostras da campanha) e o limite, quando há um único
+    limite numérico para os pontos. Devolve o PNG.
+    """
+    datas = pd.to_datetime(spec["datas"])
+
+    fig, ax = _nova_figura(12, 6)
+    for ponto, valores in spec["series"].items():
+        ax.plot(datas, valores, marker="o", linewidth=2, label=ponto)
+
+    if spec["limite"] is not None:
+        ax.axhline(
+            spec["limite"], color="red", linestyle="--", linewidth=3, label="VMP"
+        )
+
+    ax.set_ylabel("Concentração")
+    ax.set_title(spec["titulo"])
+    ax.legend()
+    ax.grid(True, axis="y", linestyle="--", alpha=0.7)
+    fig.autofmt_xdate()
 
-    return figs
+    return _png(fig)
@@ -0,0 +1,103 @@
+# app/utils/graficos_pool.py
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from app.config import settings
+from app.utils import cache_graficos
+from app.utils.graficos import chave_qualidade_agua, desenhar_qualidade_agua
+
+_pool = None
+_lock = threading.Lock()
+
+
+def _aquecer_worker() -> None:
+    """Carrega o matplotlib e as fontes no processo antes do primeiro pedido."""
+    desenhar_qualidade_agua(
+        {
+            "pontos": ["P1"],
+            "superficie": [1.0],
+            "meio": [1.0],
+            "fundo": [1.0],
+            "limite": 1.0,
+            "titulo": "",
+        }
+    )
+
+
+def get_pool_graficos():
+    """
+    Pool de processos que desenha os gráficos. Usa "spawn" para não herdar
+    threads e locks do servidor. Devolve None quando GRAFICOS_WORKERS é 0
+    (gráficos desenhados na própria thread).
+    """
+    global _pool
+    if settings.GRAFICOS_WORKERS <= 0:
+        return None
+    with _lock:
+        if not _pool:
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.GRAFICOS_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_aquecer_worker,
+            )
+        return _pool
+
+
+def aquecer_pool_graficos() -> None:
+    """Sobe todos os processos do pool (chamado no startup da API)."""
+    pool = get_pool_graficos()
+    if pool:
+        list(pool.map(abs, range(settings.GRAFICOS_WORKERS)))
+
+
+def encerrar_pool_graficos() -> None:
+    global _pool
+    with _lock:
+        if _pool:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def _desenhar_lote(specs: list, desenhar) -> list:
+    pool = get_pool_graficos()
+    if pool is None or len(specs) <= 1:
+        return [desenhar(spec) for spec in specs]
+    chunksize = max(1, len(specs) // (settings.GRAFICOS_WORKERS * 4))
+    try:
+        return list(pool.map(desenhar, specs, chunksize=chunksize))
+    except BrokenProcessPool:
+        encerrar_pool_graficos()
+        return [desenhar(spec) for spec in specs]
+
+
+def renderizar_graficos(
+    specs: list, desenhar=desenhar_qualidade_agua, chave=chave_qualidade_agua
+) -> list:
+    """
+    Devolve os PNGs de um lote de specs (por padrão de
+    `specs_qualidade_agua`), na mesma ordem. `desenhar` precisa ser uma
+    função de módulo, para ir aos processos do pool. Os que já estão no
+    cache não são redesenhados; os demais são desenhados em paralelo no
+    pool e guardados no cache. Se o pool tiver caído, ele é recriado no
+    próximo uso e o lote atual é desenhado na própria thread.
+    """
+    chaves = [chave(spec) for spec in specs]
+    pngs = [cache_graficos.ler(chave) for chave in chaves]
+
+    # specs repetidos no lote são desenhados uma vez só
+    faltantes = {
+        chave: spec for chave, spec, png in zip(chaves, specs, pngs) if png is None
+    }
+    desenhados = dict(
+        zip(faltantes, _desenhar_lote(list(faltantes.values()), desenhar))
+    )
+    for chave, png in desenhados.items():
+        cache_graficos.gravar(chave, png)
+
+    return [
+        png if png is not None else desenhados[chave]
+        for chave, png in zip(chaves, pngs)
+    ]
+
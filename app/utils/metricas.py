@@ -0,0 +1,155 @@
+# app/utils/metricas.py
+import bisect
+import contextvars
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+# Limites (em segundos) dos buckets dos histogramas de duração
+BUCKETS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# nome -> métrica, na ordem de registro (é a ordem do /metrics)
+_metricas = {}
+_lock = threading.Lock()
+
+# spans do rastro ativo (ver `rastrear`); as etapas levam o contexto junto
+_rastro = contextvars.ContextVar("rastro", default=None)
+
+
+def _escapar(valor) -> str:
+    texto = str(valor).replace("\\", "\\\\").replace('"', '\\"')
+    return texto.replace("\n", "\\n")
+
+
+def _rotulos(chave: tuple, **extra) -> str:
+    pares = chave + tuple(extra.items())
+    if not pares:
+        return ""
+    return "{" + ",".join(f'{nome}="{_escapar(valor)}"' for nome, valor in pares) + "}"
+
+
+class Histograma:
+    """
+    Histograma no formato do Prometheus, com uma série por combinação de
+    rótulos. Seguro para uso entre threads.
+    """
+
+    tipo = "histogram"
+
+    def __init__(self, nome: str, ajuda: str, buckets=BUCKETS_SEGUNDOS):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.buckets = tuple(buckets)
+        self._series = {}  # rótulos -> [contagem por bucket..., +Inf, soma]
+        self._lock = threading.Lock()
+
+    def observar(self, valor: float, **rotulos) -> None:
+        chave = tuple(sorted(rotulos.items()))
+        i = bisect.bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self._series.get(chave)
+            if serie is None:
+                serie = self._series[chave] = [0] * (len(self.buckets) + 1) + [0.0]
+            serie[i] += 1
+            serie[-1] += valor
+
+    def exportar(self) -> list:
+        with self._lock:
+            series = {chave: list(serie) for chave, serie in self._series.items()}
+        linhas = []
+        for chave, serie in sorted(series.items()):
+            acumulado = 0
+            for limite, contagem in zip(self.buckets + (math.inf,), serie[:-1]):
+                acumulado += contagem
+                le = "+Inf" if limite == math.inf else repr(float(limite))
+                linhas.append(f"{self.nome}_bucket{_rotulos(chave, le=le)} {acumulado}")
+            linhas.append(f"{self.nome}_sum{_rotulos(chave)} {serie[-1]!r}")
+            linhas.append(f"{self.nome}_count{_rotulos(chave)} {acumulado}")
+        return linhas
+
+
+class Contador:
+    """Contador no formato do Prometheus, com uma série por combinação de rótulos."""
+
+    tipo = "counter"
+
+    def __init__(self, nome: str, ajuda: str):
+        self.nome = nome
+        self.ajuda = ajuda
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def incrementar(self, valor: float = 1, **rotulos) -> None:
+        chave = tuple(sorted(rotulos.items()))
+        with self._lock:
+            self._series[chave] = self._series.get(chave, 0) + valor
+
+    def exportar(self) -> list:
+        with self._lock:
+            series = dict(self._series)
+        return [
+            f"{self.nome}{_rotulos(chave)} {valor}"
+            for chave, valor in sorted(series.items())
+        ]
+
+
+def _registrar(classe, nome: str, *args):
+    with _lock:
+        metrica = _metricas.get(nome)
+        if metrica is None:
+            metrica = _metricas[nome] = classe(nome, *args)
+        return metrica
+
+
+def histograma(nome: str, ajuda: str, buckets=BUCKETS_SEGUNDOS) -> Histograma:
+    """Histograma registrado com esse nome (criado na primeira chamada)."""
+    return _registrar(Histograma, nome, ajuda, buckets)
+
+
+def contador(nome: str, ajuda: str) -> Contador:
+    """Contador registrado com esse nome (criado na primeira chamada)."""
+    return _registrar(Contador, nome, ajuda)
+
+
+def exportar_prometheus() -> str:
+    """Todas as métricas registradas no formato texto do Prometheus (0.0.4)."""
+    with _lock:
+        metricas = list(_metricas.values())
+    linhas = []
+    for metrica in metricas:
+        linhas.append(f"# HELP {metrica.nome} {metrica.ajuda}")
+        linhas.append(f"# TYPE {metrica.nome} {metrica.tipo}")
+        linhas.extend(metrica.exportar())
+    return "\n".join(linhas) + "\n"
+
+
+@contextmanager
+def span(metrica: Histograma, **rotulos):
+    """
+    Mede a duração do bloco e a observa no histograma, com ou sem exceção.
+    Dentro de `rastrear`, o span também entra no rastro.
+    """
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        duracao = time.perf_counter() - inicio
+        metrica.observar(duracao, **rotulos)
+        spans = _rastro.get()
+        if spans is not None:
+            spans.append((metrica.nome, rotulos, duracao))
+
+
+@contextmanager
+def rastrear():
+    """
+    Coleta em uma lista (nome, rótulos, duração) de cada span que termina
+    dentro do bloco, inclusive nas etapas executadas em outras threads.
+    """
+    spans = []
+    token = _rastro.set(spans)
+    try:
+        yield spans
+    finally:
+        _rastro.reset(token)
@@ -0,0 +1,55 @@
+# app/utils/perfil.py
+import contextvars
+import cProfile
+import io
+import pstats
+from contextlib import contextmanager
+
+from app.utils.metricas import rastrear
+
+# Ligado dentro de `perfilar`: o cProfile só enxerga a thread em que foi
+# ativado, então as etapas do relatório rodam nela, em sequência
+_ativo = contextvars.ContextVar("perfil_ativo", default=False)
+
+
+def perfil_ativo() -> bool:
+    return _ativo.get()
+
+
+class Perfil:
+    """Resumo de uma execução perfilada, preenchido ao sair de `perfilar`."""
+
+    resumo = ""
+
+
+def _resumir(spans: list, profiler: cProfile.Profile, linhas: int) -> str:
+    saida = io.StringIO()
+    saida.write("Spans (s)\n")
+    for nome, rotulos, duracao in spans:
+        detalhe = ",".join(f"{k}={v}" for k, v in sorted(rotulos.items()))
+        saida.write(f"{duracao:9.4f}  {nome} {detalhe}\n")
+    saida.write("\n")
+    estatisticas = pstats.Stats(profiler, stream=saida)
+    estatisticas.strip_dirs().sort_stats("cumulative").print_stats(linhas)
+    return saida.getvalue()
+
+
+@contextmanager
+def perfilar(linhas: int = 30):
+    """
+    Executa o bloco sob o cProfile e, ao sair (com ou sem exceção), preenche
+    `Perfil.resumo` com os spans do rastro e as `linhas` funções de maior
+    tempo acumulado. O desenho dos gráficos no pool de processos aparece
+    como espera, não como chamadas do matplotlib.
+    """
+    perfil = Perfil()
+    profiler = cProfile.Profile()
+    with rastrear() as spans:
+        token = _ativo.set(True)
+        profiler.enable()
+        try:
+            yield perfil
+        finally:
+            profiler.disable()
+            _ativo.reset(token)
+            perfil.resumo = _resumir(spans, profiler, linhas)
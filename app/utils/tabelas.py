@@ -0,0 +1,73 @@
+# app/utils/tabelas.py
+from xml.sax.saxutils import escape
+
+import pandas as pd
+from docx.enum.table import WD_TABLE_ALIGNMENT
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls, qn
+
+# Montar tabelas com add_row().cells / cell.text / cell.merge é quadrático:
+# o python-docx percorre a grade XML inteira a cada acesso a `.cells`.
+# Aqui a estrutura da tabela (estilo, alinhamento, larguras) vem do
+# python-docx e todas as linhas são geradas em um único fragmento XML.
+
+
+def _celula(texto: str, largura: str, negrito=False, vmerge=None) -> str:
+    tc_pr = f'<w:tcW w:w="{largura}" w:type="dxa"/>'
+    if vmerge == "restart":
+        tc_pr += '<w:vMerge w:val="restart"/>'
+    elif vmerge:
+        tc_pr += "<w:vMerge/>"
+    if texto == "":
+        return f"<w:tc><w:tcPr>{tc_pr}</w:tcPr><w:p/></w:tc>"
+    r_pr = "<w:rPr><w:b/></w:rPr>" if negrito else ""
+    return (
+        f"<w:tc><w:tcPr>{tc_pr}</w:tcPr><w:p><w:r>{r_pr}"
+        f'<w:t xml:space="preserve">{escape(texto)}</w:t></w:r></w:p></w:tc>'
+    )
+
+
+def tabela_por_ponto(
+    subdoc, df: pd.DataFrame, colunas: list, coluna_grupo: str = "Ponto"
+):
+    """
+    Adiciona ao subdoc uma tabela "Table Grid" centralizada com cabeçalho em
+    negrito (`coluna_grupo` + `colunas`) e uma linha por registro do
+    DataFrame. Os registros de cada grupo ficam juntos, na ordem em que o
+    grupo aparece, e a célula de `coluna_grupo` é mesclada verticalmente.
+    Os valores são escritos com str(), como nas tabelas montadas célula a
+    célula.
+    """
+    # 1) Estrutura da tabela (tblPr e tblGrid) pelo python-docx
+    table = subdoc.add_table(rows=0, cols=1 + len(colunas))
+    table.style = "Table Grid"
+    table.alignment = WD_TABLE_ALIGNMENT.CENTER
+    larguras = [col.get(qn("w:w")) for col in table._tbl.tblGrid.gridCol_lst]
+
+    # 2) Registros agrupados pela ordem de aparecimento do grupo
+    codigos, _ = pd.factorize(df[coluna_grupo], use_na_sentinel=False)
+    df = df.iloc[codigos.argsort(kind="stable")]
+    grupos = df[coluna_grupo].to_numpy(dtype=object)
+    valores = df[colunas].to_numpy(dtype=object)
+
+    # 3) Todas as linhas em um único fragmento XML
+    partes = ["<w:tr>"]
+    for texto, largura in zip([coluna_grupo] + list(colunas), larguras):
+        partes.append(_celula(str(texto), largura, negrito=True))
+    partes.append("</w:tr>")
+
+    anterior = object()
+    for grupo, linha in zip(grupos, valores):
+        partes.append("<w:tr>")
+        if grupo != anterior:
+            partes.append(_celula(str(grupo), larguras[0], vmerge="restart"))
+            anterior = grupo
+        else:
+            partes.append(_celula("", larguras[0], vmerge="continue"))
+        for valor, largura in zip(linha, larguras[1:]):
+            partes.append(_celula(str(valor), largura))
+        partes.append("</w:tr>")
+
+    fragmento = parse_xml(f"<w:tbl {nsdecls('w')}>{''.join(partes)}</w:tbl>")
+    table._tbl.extend(list(fragmento))
+    return table
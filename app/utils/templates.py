@@ -0,0 +1,58 @@
+# app/utils/templates.py
+import copy
+import os
+import threading
+
+from docx import Document
+from docxtpl import DocxTemplate
+
+PASTA_RELATORIOS = os.path.join(os.getcwd(), "app/services/relatorios")
+
+# caminho -> (mtime do arquivo, Document pristino já parseado)
+_templates = {}
+_lock = threading.Lock()
+
+
+def _pristino(caminho: str):
+    mtime = os.stat(caminho).st_mtime_ns
+    with _lock:
+        entrada = _templates.get(caminho)
+        if entrada is None or entrada[0] != mtime:
+            # primeira carga ou arquivo alterado em disco (hot reload)
+            entrada = (mtime, Document(caminho))
+            _templates[caminho] = entrada
+    return entrada[1]
+
+
+def versao_template(caminho: str) -> int:
+    """
+    Versão do template em disco (mtime em ns, o mesmo que decide o hot
+    reload): muda sempre que o arquivo é alterado.
+    """
+    return os.stat(caminho).st_mtime_ns
+
+
+def obter_template(caminho: str) -> DocxTemplate:
+    """
+    Devolve um DocxTemplate pronto para renderizar, clonado da cópia
+    pristina mantida em memória. O .docx só é lido e parseado de novo
+    quando o arquivo muda em disco.
+    """
+    document = DocxTemplate(caminho)
+    document.docx = copy.deepcopy(_pristino(caminho))
+    return document
+
+
+def carregar_templates(caminhos=None) -> None:
+    """
+    Pré-carrega os templates informados (por padrão, todos os .docx de
+    app/services/relatorios/).
+    """
+    if caminhos is None:
+        caminhos = [
+            os.path.join(PASTA_RELATORIOS, nome)
+            for nome in sorted(os.listdir(PASTA_RELATORIOS))
+            if nome.endswith(".docx") and not nome.startswith("~$")
+        ]
+    for caminho in caminhos:
+        _pristino(caminho)
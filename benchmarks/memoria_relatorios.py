@@ -0,0 +1,78 @@
+# benchmarks/memoria_relatorios.py
+"""
+Mede o pico de memória (tracemalloc) e o tempo de cada relatório em uma
+campanha grande (N pontos x 3 profundidades, todos os parâmetros do esquema),
+com o Supabase falso e as fotos servidas localmente
+(benchmarks/supabase_falso.py).
+
+Cada repetição usa resultados novos, para que o cache de gráficos não
+esconda o custo. Para comparar com outra versão do código, rode o mesmo
+script com o PYTHONPATH apontando para um checkout dela:
+
+    python -m benchmarks.memoria_relatorios [--pontos 30] [--repeticoes 3]
+    git worktree add /tmp/antes <commit>
+    PYTHONPATH=/tmp/antes:. python benchmarks/memoria_relatorios.py
+"""
+import argparse
+import importlib
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+# o tracemalloc só enxerga este processo: os gráficos são desenhados nele
+os.environ.setdefault("GRAFICOS_WORKERS", "0")
+
+from benchmarks import supabase_falso  # noqa: E402
+
+import numpy as np  # noqa: E402
+
+TIPOS = {
+    "qag": ("app.services.qag_service", "gerar_relatorio_qag", "app.schemas.qag", "QAGRequest"),
+    "qsd": ("app.services.qsd_service", "gerar_relatorio_qsd", "app.schemas.qsd", "QSDRequest"),
+}
+
+
+def medir(tipo, n_pontos, repeticoes, urls_fotos):
+    modulo, funcao, modulo_schema, schema = TIPOS[tipo]
+    servico = importlib.import_module(modulo)
+    gerar = getattr(servico, funcao)
+    payload = supabase_falso.payload(getattr(importlib.import_module(modulo_schema), schema))
+    rng = np.random.default_rng(0)
+    picos, tempos = [], []
+    for i in range(repeticoes + 1):
+        supabase = supabase_falso.SupabaseFalso()
+        supabase_falso.popular(supabase, servico.ESPECIFICACAO, rng, n_pontos, urls_fotos)
+        tracemalloc.start()
+        inicio = time.perf_counter()
+        gerar(supabase, payload)
+        tempo = time.perf_counter() - inicio
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        if i:  # a primeira execução só aquece imports, templates e fontes
+            picos.append(pico / 2**20)
+            tempos.append(tempo)
+    return statistics.median(picos), statistics.median(tempos)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pontos", type=int, default=30)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--tipos", nargs="+", default=["qag", "qsd"])
+    args = parser.parse_args()
+
+    # os templates usam caminhos relativos à raiz do checkout medido
+    import app
+
+    os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(app.__file__))))
+    urls_fotos = supabase_falso.servidor_fotos()
+    for tipo in args.tipos:
+        pico, tempo = medir(tipo, args.pontos, args.repeticoes, urls_fotos)
+        print(f"{tipo:5s} {args.pontos} pontos  pico {pico:7.1f} MB  {tempo:6.2f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+# benchmarks/rss_graficos.py
+"""
+Verifica que a camada de gráficos não acumula memória entre relatórios.
+
+Renderiza os gráficos equivalentes a N relatórios QAG/QSD e compara o RSS
+do processo depois do aquecimento com o RSS ao final. Sai com código 1 se
+o crescimento passar do limite.
+
+    python -m benchmarks.rss_graficos [--relatorios 100] [--limite-mb 20]
+"""
+import argparse
+import gc
+import os
+import sys
+
+# o Settings exige as variáveis do Supabase, que este benchmark não usa
+os.environ.setdefault("SUPABASE_URL", "http://localhost")
+os.environ.setdefault("SUPABASE_KEY", "benchmark")
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from app.services.vmps.vmp_qag import vmp_qag  # noqa: E402
+from app.services.vmps.vmp_qsd import vmp_qsd  # noqa: E402
+from app.utils.graficos import (  # noqa: E402
+    gera_distribuicao_granulometrica_qsd,
+    grafico_qualidade_agua,
+    graficos_linha_com_vmp_por_classe_qsd,
+)
+
+CLASSE_QAG = "Águas Doces - Nível 1"
+CLASSE_QSD = next(iter(vmp_qsd))
+GRANULOMETRIA = [
+    "Areia muito grossa (%)",
+    "Areia grossa (%)",
+    "Areia média (%)",
+    "Areia fina (%)",
+    "Areia muito fina (%)",
+    "Silte (%)",
+    "Argila (%)",
+]
+
+
+def rss_mb() -> float:
+    """RSS atual do processo em MB (Linux)."""
+    with open("/proc/self/statm") as f:
+        paginas = int(f.read().split()[1])
+    return paginas * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def dados_qag(rng, parametros, n_pontos=6):
+    linhas = []
+    for p in range(n_pontos):
+        for prof in ("Superfície", "Meio", "Fundo"):
+            linha = {"Ponto": f"P{p + 1}", "Classe": CLASSE_QAG, "Profundidade": prof}
+            linha.update(zip(parametros, rng.uniform(0, 10, len(parametros))))
+            linhas.append(linha)
+    return pd.DataFrame(linhas)
+
+
+def dados_qsd(rng, n_pontos=6):
+    colunas = list(vmp_qsd[CLASSE_QSD])[:3]
+    df = pd.DataFrame(rng.uniform(0, 60, (n_pontos, len(colunas))), columns=colunas)
+    df.insert(0, "Ponto", [f"P{p + 1}" for p in range(n_pontos)])
+    df.insert(1, "Classe", CLASSE_QSD)
+    granulometria = rng.dirichlet(np.ones(len(GRANULOMETRIA)), n_pontos) * 100
+    return df, colunas, pd.DataFrame(granulometria, columns=GRANULOMETRIA)
+
+
+def relatorio(rng, parametros) -> int:
+    """Gera os gráficos de um relatório e devolve o total de bytes PNG."""
+    medias = dados_qag(rng, parametros).groupby(["Ponto", "Profundidade"]).mean(
+        numeric_only=True
+    )
+    pngs = grafico_qualidade_agua(medias, parametros, CLASSE_QAG, vmp_qag)
+    df, colunas, granulometria = dados_qsd(rng)
+    pngs += graficos_linha_com_vmp_por_classe_qsd(df, colunas, vmp_qsd)
+    pngs.append(gera_distribuicao_granulometrica_qsd(granulometria))
+    return sum(len(png) for png in pngs)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--relatorios", type=int, default=100)
+    parser.add_argument("--aquecimento", type=int, default=5)
+    parser.add_argument("--limite-mb", type=float, default=20.0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    parametros = [
+        p for p, v in vmp_qag[CLASSE_QAG].items() if isinstance(v, (int, float))
+    ][:10]
+
+    for _ in range(args.aquecimento):
+        relatorio(rng, parametros)
+    gc.collect()
+    inicial = rss_mb()
+
+    for i in range(args.relatorios):
+        relatorio(rng, parametros)
+        if (i + 1) % 25 == 0:
+            print(f"{i + 1:4d} relatórios  RSS {rss_mb():7.1f} MB")
+    gc.collect()
+    crescimento = rss_mb() - inicial
+
+    print(f"RSS inicial {inicial:.1f} MB, crescimento {crescimento:+.1f} MB")
+    return 1 if crescimento > args.limite_mb else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
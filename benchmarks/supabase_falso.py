@@ -0,0 +1,272 @@
+# benchmarks/supabase_falso.py
+"""
+Supabase falso em memória (tabelas e Storage), fotos servidas localmente e
+campanhas sintéticas para os benchmarks, sem projeto Supabase nem rede.
+
+As campanhas seguem `app/services/relatorios/resultados_qag.csv`: uma
+amostra por ponto e profundidade, classes do relatório e valores sorteados
+na faixa observada de cada parâmetro no CSV. O número de pontos e de
+parâmetros é ajustável.
+
+Importe este módulo antes de `app`: ele define as variáveis de ambiente
+que o `Settings` exige e aponta os caches de fotos e gráficos para
+diretórios temporários novos.
+"""
+import datetime
+import functools
+import http.server
+import os
+import tempfile
+import threading
+import uuid
+
+os.environ.setdefault("SUPABASE_URL", "http://localhost")
+os.environ.setdefault("SUPABASE_KEY", "benchmark")
+os.environ.setdefault("GRAFICOS_CACHE_DIR", tempfile.mkdtemp())
+os.environ.setdefault("FOTO_CACHE_DIR", tempfile.mkdtemp())
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+from PIL import Image  # noqa: E402
+
+ATIVO = str(uuid.uuid4())
+DATA = "2025-03-10"
+PROFUNDIDADES = ("Superfície", "Meio", "Fundo")
+GRANULOMETRIA = (
+    "Areia muito grossa (%)",
+    "Areia grossa (%)",
+    "Areia média (%)",
+    "Areia fina (%)",
+    "Areia muito fina (%)",
+    "Silte (%)",
+    "Argila (%)",
+)
+CSV_REFERENCIA = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "app/services/relatorios/resultados_qag.csv",
+)
+TAMANHOS_FOTOS = ((1600, 1200), (4032, 3024), (1200, 1600))
+
+
+class _Resposta:
+    def __init__(self, data):
+        self.data = data
+
+
+class _Consulta:
+    """Consulta encadeada como a do supabase-py (select/eq/in_/insert)."""
+
+    def __init__(self, banco, tabela):
+        self.banco, self.tabela, self.filtros, self.colunas = banco, tabela, [], None
+
+    def select(self, *colunas, **_):
+        if colunas and colunas != ("*",):
+            self.colunas = [c.strip() for c in ",".join(colunas).split(",")]
+        return self
+
+    def eq(self, coluna, valor):
+        self.filtros.append(lambda l: str(l.get(coluna)) == str(valor))
+        return self
+
+    def in_(self, coluna, valores):
+        valores = {str(v) for v in valores}
+        self.filtros.append(lambda l: str(l.get(coluna)) in valores)
+        return self
+
+    def order(self, *_, **__):
+        return self
+
+    def insert(self, linha):
+        self.banco.setdefault(self.tabela, []).append(linha)
+        self.filtros.append(lambda l: l is linha)
+        return self
+
+    def execute(self):
+        linhas = self.banco.get(self.tabela, [])
+        linhas = [l for l in linhas if all(f(l) for f in self.filtros)]
+        if self.colunas:
+            linhas = [{c: l.get(c) for c in self.colunas} for l in linhas]
+        return _Resposta(linhas)
+
+
+class _Bucket:
+    def __init__(self, objetos, nome):
+        self.objetos, self.nome = objetos, nome
+
+    def upload(self, caminho, arquivo, *_, **__):
+        dados = arquivo.read() if hasattr(arquivo, "read") else arquivo
+        self.objetos[(self.nome, caminho)] = bytes(dados)
+
+    def download(self, caminho):
+        return self.objetos[(self.nome, caminho)]
+
+    def get_public_url(self, caminho):
+        return f"http://storage/{self.nome}/{caminho}"
+
+    def create_signed_url(self, caminho, expires_in):
+        return {"signedURL": f"http://storage/{self.nome}/{caminho}?expira={expires_in}"}
+
+
+class _Storage:
+    def __init__(self):
+        self.objetos = {}  # (bucket, caminho) -> bytes
+
+    def from_(self, bucket):
+        return _Bucket(self.objetos, bucket)
+
+
+class SupabaseFalso:
+    """Cliente com `table()` e `storage` guardando tudo em dicionários."""
+
+    def __init__(self):
+        self.banco = {}  # tabela -> lista de linhas
+        self.storage = _Storage()
+
+    def table(self, nome):
+        return _Consulta(self.banco, nome)
+
+
+def servidor_fotos(latencia: float = 0.0) -> list:
+    """
+    Grava fotos JPEG de tamanhos de câmera em um diretório temporário, sobe
+    um servidor HTTP local para elas e devolve as URLs. `latencia` (em
+    segundos) atrasa cada resposta, simulando o Storage remoto.
+    """
+    diretorio = tempfile.mkdtemp(prefix="fotos_")
+    nomes = []
+    for i, tamanho in enumerate(TAMANHOS_FOTOS):
+        nome = f"foto{i}.jpg"
+        Image.new("RGB", tamanho, (40 + 60 * i, 100, 200)).save(
+            os.path.join(diretorio, nome), "JPEG"
+        )
+        nomes.append(nome)
+
+    class Handler(http.server.SimpleHTTPRequestHandler):
+        def do_GET(self):
+            if latencia:
+                threading.Event().wait(latencia)
+            super().do_GET()
+
+        def log_message(self, *_):
+            pass
+
+    servidor = http.server.ThreadingHTTPServer(
+        ("127.0.0.1", 0), functools.partial(Handler, directory=diretorio)
+    )
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    porta = servidor.server_address[1]
+    return [f"http://127.0.0.1:{porta}/{nome}" for nome in nomes]
+
+
+@functools.lru_cache(maxsize=None)
+def _faixas() -> tuple:
+    """(faixa por parâmetro, faixa geral) observadas no CSV de referência."""
+    numericas = pd.read_csv(CSV_REFERENCIA).select_dtypes("number")
+    numericas = numericas.drop(columns=["Data", "Profundidade"], errors="ignore")
+    faixas = {c: (numericas[c].min(), numericas[c].max()) for c in numericas}
+    geral = (float(np.nanmin(numericas.values)), float(np.nanmax(numericas.values)))
+    return faixas, geral
+
+
+def resultados(especificacao, rng, n_pontos: int, n_parametros=None, faltantes=0.05) -> list:
+    """
+    Amostras sintéticas para `especificacao`: uma por ponto (e por
+    profundidade, se o esquema tiver Profundidade), com as classes do
+    relatório em rodízio. Só os primeiros `n_parametros` parâmetros do
+    esquema (todos, se None) recebem valores; os demais vêm vazios, como
+    análises não realizadas, para que as seções que os citam continuem
+    válidas. Uma fração `faltantes` das medidas também fica vazia. A
+    granulometria do QSD soma 100%.
+    """
+    esquema = especificacao.esquema
+    classes = list(especificacao.limites.classes)
+    todas = [c for c in dict.fromkeys(esquema.medidas) if c not in GRANULOMETRIA]
+    medidas = todas[:n_parametros]
+    vazias = dict.fromkeys(todas[len(medidas):])
+    granulometria = [c for c in GRANULOMETRIA if c in esquema.medidas]
+    profundidades = PROFUNDIDADES if "Profundidade" in esquema.categorias else (None,)
+    faixas, geral = _faixas()
+    minimos = np.array([faixas.get(c, geral)[0] for c in medidas])
+    maximos = np.array([faixas.get(c, geral)[1] for c in medidas])
+
+    linhas = []
+    for p in range(n_pontos):
+        for profundidade in profundidades:
+            linha = {"Ponto": f"P{p + 1}", especificacao.coluna_classe: classes[p % len(classes)]}
+            if profundidade:
+                linha["Profundidade"] = profundidade
+            if "Tipo de análise" in esquema.categorias:
+                linha["Tipo de análise"] = "Químico"
+            if "Toxicidade" in esquema.categorias:
+                linha["Toxicidade"] = "Tóxico" if p % 3 == 0 else "Não tóxico"
+            valores = rng.uniform(minimos, maximos).round(2).astype(object)
+            valores[rng.random(len(medidas)) < faltantes] = None
+            linha.update(zip(medidas, valores.tolist()))
+            linha.update(vazias)
+            if granulometria:
+                partes = rng.dirichlet(np.ones(len(granulometria))) * 100
+                linha.update(zip(granulometria, partes.round(2).tolist()))
+            linhas.append(linha)
+    return linhas
+
+
+def popular(supabase, especificacao, rng, n_pontos: int, urls_fotos: list, n_parametros=None) -> None:
+    """
+    Grava no `supabase` o ativo, a configuração do formulário e uma campanha
+    em DATA para `especificacao`, com as fotos apontando para `urls_fotos`.
+    Chamadas seguidas substituem a campanha anterior do mesmo formulário.
+    """
+    supabase.banco["ativos"] = [
+        {
+            "id": ATIVO,
+            "nome": "Ativo",
+            "cnpj": "00.000.000/0001-00",
+            "endereco": "Rua",
+            "numero_licenca": "L-1",
+            "orgao_regulador": "Órgão",
+        }
+    ]
+    configuracoes = [
+        c
+        for c in supabase.banco.get("configuracao_formulario_ativos", [])
+        if c["tipo_formulario"] != especificacao.formulario
+    ]
+    configuracoes.append(
+        {
+            "ativo_id": ATIVO,
+            "tipo_formulario": especificacao.formulario,
+            "localizacao_dos_pontos_de_monitoramento": "Pontos",
+            "parametro_periodicidade": "Mensal",
+            "dados_laboratoriais": [{"metodologia_adotada": "Método"}],
+        }
+    )
+    supabase.banco["configuracao_formulario_ativos"] = configuracoes
+
+    campanha = {
+        "ativo_id": ATIVO,
+        "campanha_de_coleta": DATA,
+        "nome_laboratorio": "Laboratório",
+        "razao_social_laboratorio": "Laboratório SA",
+        "cnpj_laboratorio": "00.000.000/0002-00",
+        "endereco_laboratorio": "Rua",
+        "responsavel_tecnico": "Responsável",
+        "email": "lab@example.com",
+        "contato": "0000-0000",
+        "laudos": ["http://example.com/laudo.pdf"],
+        "laudo": ["http://example.com/laudo.pdf"],
+        "resultados": resultados(especificacao, rng, n_pontos, n_parametros),
+    }
+    for i, coluna in enumerate(c for c in especificacao.colunas_formulario if c.startswith("registro")):
+        campanha[coluna] = [urls_fotos[i % len(urls_fotos)]]
+    supabase.banco[especificacao.formulario] = [campanha]
+
+
+def payload(schema):
+    """Requisição do relatório para a campanha gravada por `popular`."""
+    return schema(
+        ativo_id=ATIVO,
+        data_campanha=datetime.date.fromisoformat(DATA),
+        user_id=uuid.uuid4(),
+        descricao_relatorio="benchmark",
+        periodicidade="Mensal",
+    )
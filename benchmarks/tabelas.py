@@ -0,0 +1,100 @@
+# benchmarks/tabelas.py
+"""
+Compara a montagem das tabelas por ponto célula a célula (add_row/merge,
+como era feito nos serviços) com `tabela_por_ponto`, em uma campanha de
+50 pontos x 3 profundidades x 110 parâmetros, e confere que as duas
+tabelas têm o mesmo conteúdo.
+
+    python -m benchmarks.tabelas [--pontos 50] [--parametros 110]
+"""
+import argparse
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from docx import Document
+from docx.enum.table import WD_TABLE_ALIGNMENT
+
+from app.utils.tabelas import tabela_por_ponto
+
+
+def campanha(n_pontos: int, n_parametros: int) -> tuple:
+    rng = np.random.default_rng(0)
+    parametros = [f"Parâmetro {i} (mg/L)" for i in range(n_parametros)]
+    linhas = []
+    for p in range(n_pontos):
+        for prof in ("Superfície", "Meio", "Fundo"):
+            linha = {"Ponto": f"P{p + 1}", "Profundidade": prof}
+            linha.update(zip(parametros, rng.uniform(0, 10, n_parametros).round(3)))
+            linhas.append(linha)
+    return pd.DataFrame(linhas), parametros
+
+
+def tabela_celula_a_celula(doc, df, parametros):
+    """Montagem original dos serviços (add_row().cells + cell.merge)."""
+    n_cols = 2 + len(parametros)
+    table = doc.add_table(rows=1, cols=n_cols)
+    table.style = "Table Grid"
+    table.alignment = WD_TABLE_ALIGNMENT.CENTER
+
+    hdr = table.rows[0].cells
+    hdr[0].text = "Ponto"
+    hdr[1].text = "Profundidade"
+    for idx, param in enumerate(parametros, start=2):
+        hdr[idx].text = param
+    for cell in hdr:
+        for paragraph in cell.paragraphs:
+            for run in paragraph.runs:
+                run.font.bold = True
+
+    grupos = OrderedDict()
+    for linha in df.to_dict(orient="records"):
+        grupos.setdefault(linha["Ponto"], []).append(linha)
+
+    current_row = 1
+    for ponto, linhas in grupos.items():
+        start_row = current_row
+        for linha in linhas:
+            row = table.add_row().cells
+            row[1].text = str(linha["Profundidade"])
+            for j, param in enumerate(parametros, start=2):
+                row[j].text = str(linha.get(param, ""))
+            current_row += 1
+        end_row = current_row - 1
+        cell_to_keep = table.cell(start_row, 0)
+        for r in range(start_row + 1, end_row + 1):
+            cell_to_keep = cell_to_keep.merge(table.cell(r, 0))
+        cell_to_keep.text = ponto
+    return table
+
+
+def conteudo(table) -> list:
+    return [[cell.text for cell in row.cells] for row in table.rows]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pontos", type=int, default=50)
+    parser.add_argument("--parametros", type=int, default=110)
+    args = parser.parse_args()
+
+    df, parametros = campanha(args.pontos, args.parametros)
+    print(f"{len(df)} linhas x {len(parametros) + 2} colunas")
+
+    inicio = time.perf_counter()
+    antiga = tabela_celula_a_celula(Document(), df, parametros)
+    t_antiga = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    nova = tabela_por_ponto(Document(), df, ["Profundidade"] + parametros)
+    t_nova = time.perf_counter() - inicio
+
+    print(f"célula a célula   {t_antiga:8.3f} s")
+    print(f"tabela_por_ponto  {t_nova:8.3f} s  ({t_antiga / t_nova:.0f}x)")
+    assert conteudo(antiga) == conteudo(nova), "conteúdo das tabelas difere"
+    print("conteúdo idêntico")
+
+
+if __name__ == "__main__":
+    main()
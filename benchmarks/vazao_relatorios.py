@@ -0,0 +1,181 @@
+# benchmarks/vazao_relatorios.py
+"""
+Mede a geração dos relatórios QAG, QSD e QAGS de ponta a ponta, com o
+Supabase falso e as fotos servidas localmente (benchmarks/supabase_falso.py).
+
+Cada cenário (tipo x número de pontos) roda em um processo novo, para que
+o pico de RSS seja só dele. A primeira geração aquece imports, templates
+e fontes; as seguintes usam resultados novos, para que o cache de gráficos
+não esconda o custo, e as fotos são baixadas de novo a cada geração
+(FOTO_CACHE_TTL=0). São informados a mediana do tempo total, os
+relatórios por minuto, o pico de RSS e a mediana de cada etapa (spans de
+`relatorio_etapa_duracao_segundos`).
+
+Os gráficos são desenhados no pool de processos configurado
+(GRAFICOS_WORKERS), como em produção: o pool sobe e aquece antes das
+gerações, como no startup da API, e esse tempo é informado à parte. O
+pico de RSS é o do processo do relatório, sem os processos do pool.
+`--graficos-no-processo` desenha na thread do relatório (GRAFICOS_WORKERS=0).
+
+    python -m benchmarks.vazao_relatorios [--pontos 5 30] [--parametros N]
+        [--repeticoes 3] [--tipos qag qsd qags] [--latencia-fotos 0.05]
+        [--graficos-no-processo] [--json resultados.json]
+
+Para comparar com outra versão do código, aponte o PYTHONPATH para um
+checkout dela (os processos filhos herdam o caminho):
+
+    git worktree add /tmp/antes <commit>
+    PYTHONPATH=/tmp/antes:. python benchmarks/vazao_relatorios.py
+"""
+import argparse
+import importlib
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+os.environ.setdefault("FOTO_CACHE_TTL", "0")
+
+from benchmarks import supabase_falso  # noqa: E402
+
+import numpy as np  # noqa: E402
+
+TIPOS = {
+    "qag": ("app.services.qag_service", "gerar_relatorio_qag", "app.schemas.qag", "QAGRequest"),
+    "qsd": ("app.services.qsd_service", "gerar_relatorio_qsd", "app.schemas.qsd", "QSDRequest"),
+    "qags": ("app.services.qags_service", "gerar_relatorio_qags", "app.schemas.qags", "QAGSRequest"),
+}
+
+
+def pico_rss_mb() -> float:
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KiB, macOS em bytes
+    return pico / 2**20 if sys.platform == "darwin" else pico / 2**10
+
+
+def medir(tipo: str, n_pontos: int, n_parametros, repeticoes: int, latencia: float) -> dict:
+    """Executa um cenário neste processo e devolve as medianas."""
+    from app.config import settings
+    from app.utils.graficos_pool import aquecer_pool_graficos
+    from app.utils.metricas import rastrear
+
+    # 1) Pool de gráficos no ar antes das gerações, como no startup da API
+    inicio = time.perf_counter()
+    aquecer_pool_graficos()
+    aquecimento = time.perf_counter() - inicio
+
+    modulo, funcao, modulo_schema, schema = TIPOS[tipo]
+    servico = importlib.import_module(modulo)
+    gerar = getattr(servico, funcao)
+    requisicao = supabase_falso.payload(getattr(importlib.import_module(modulo_schema), schema))
+    rng = np.random.default_rng(0)
+    urls = supabase_falso.servidor_fotos(latencia)
+    tempos, etapas = [], defaultdict(list)
+    for i in range(repeticoes + 1):
+        supabase = supabase_falso.SupabaseFalso()
+        supabase_falso.popular(supabase, servico.ESPECIFICACAO, rng, n_pontos, urls, n_parametros)
+        with rastrear() as spans:
+            inicio = time.perf_counter()
+            gerar(supabase, requisicao)
+            tempo = time.perf_counter() - inicio
+        if i:  # a primeira execução só aquece
+            tempos.append(tempo)
+            for nome, rotulos, duracao in spans:
+                if "etapa" in rotulos:
+                    etapas[rotulos["etapa"]].append(duracao)
+    return {
+        "tipo": tipo,
+        "pontos": n_pontos,
+        "tempo_s": statistics.median(tempos),
+        "relatorios_min": 60 / statistics.median(tempos),
+        "pico_rss_mb": pico_rss_mb(),
+        "graficos_workers": settings.GRAFICOS_WORKERS,
+        "aquecimento_pool_s": aquecimento,
+        "etapas_s": {nome: statistics.median(v) for nome, v in etapas.items()},
+    }
+
+
+def cenario(tipo: str, n_pontos: int, args) -> dict:
+    """Roda um cenário em um processo filho e devolve o resultado dele."""
+    comando = [
+        sys.executable, "-m", "benchmarks.vazao_relatorios", "--filho",
+        "--tipos", tipo, "--pontos", str(n_pontos),
+        "--repeticoes", str(args.repeticoes),
+        "--latencia-fotos", str(args.latencia_fotos),
+    ]
+    if args.parametros:
+        comando += ["--parametros", str(args.parametros)]
+    # o filho roda na raiz do checkout medido; o caminho de imports vai absoluto
+    caminho = os.pathsep.join(os.path.abspath(p) for p in sys.path if p)
+    ambiente = dict(os.environ, PYTHONPATH=caminho)
+    if args.graficos_no_processo:
+        ambiente["GRAFICOS_WORKERS"] = "0"
+    saida = subprocess.run(comando, capture_output=True, text=True, env=ambiente)
+    if saida.returncode:
+        erro = (saida.stderr.strip().splitlines() or ["sem saída"])[-1]
+        return {"tipo": tipo, "pontos": n_pontos, "erro": erro}
+    return json.loads(saida.stdout.strip().splitlines()[-1])
+
+
+def imprimir(resultado: dict) -> None:
+    cabecalho = f"{resultado['tipo']:5s} {resultado['pontos']:4d} pontos"
+    if "erro" in resultado:
+        print(f"{cabecalho}  ERRO: {resultado['erro']}")
+        return
+    print(
+        f"{cabecalho}  {resultado['tempo_s']:7.2f} s  "
+        f"{resultado['relatorios_min']:7.1f} rel/min  "
+        f"pico RSS {resultado['pico_rss_mb']:7.1f} MB  "
+        f"gráficos: {resultado['graficos_workers']} processos "
+        f"(aquecimento {resultado['aquecimento_pool_s']:.2f} s)"
+    )
+    for nome, duracao in sorted(resultado["etapas_s"].items(), key=lambda e: -e[1]):
+        print(f"      {nome:14s} {duracao:8.3f} s")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pontos", type=int, nargs="+", default=[5, 30])
+    parser.add_argument("--parametros", type=int, default=None)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--tipos", nargs="+", default=list(TIPOS), choices=list(TIPOS))
+    parser.add_argument("--latencia-fotos", type=float, default=0.05)
+    parser.add_argument(
+        "--graficos-no-processo",
+        action="store_true",
+        help="desenha os gráficos na thread do relatório (GRAFICOS_WORKERS=0)",
+    )
+    parser.add_argument("--json", help="grava os resultados neste arquivo")
+    parser.add_argument("--filho", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # os templates usam caminhos relativos à raiz do checkout medido
+    import app
+
+    os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(app.__file__))))
+    if args.filho:
+        resultado = medir(
+            args.tipos[0], args.pontos[0], args.parametros,
+            args.repeticoes, args.latencia_fotos,
+        )
+        print(json.dumps(resultado))
+        return 0
+
+    resultados = []
+    for tipo in args.tipos:
+        for n_pontos in args.pontos:
+            resultado = cenario(tipo, n_pontos, args)
+            imprimir(resultado)
+            resultados.append(resultado)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as arquivo:
+            json.dump(resultados, arquivo, indent=2, ensure_ascii=False)
+    return 1 if any("erro" in r for r in resultados) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())